@@ -4,20 +4,33 @@ if sys.version_info >= (3, 13):
     sys.modules["imghdr"] = types.ModuleType("imghdr")
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ChatMemberUpdated
-from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, ContextTypes, ChatMemberHandler
+from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, ContextTypes, ChatMemberHandler, TypeHandler
+from telegram.error import BadRequest, Forbidden
 from pyrogram import Client, enums
-from pyrogram.errors import FloodWait
+from pyrogram.errors import FloodWait, UserAlreadyParticipant, BadRequest as RPCBadRequest, Forbidden as RPCForbidden
 from pyrogram.types import ChatPrivileges
 import os
 import hashlib
+import hmac
 import base64
 import asyncio
 import random
-from datetime import datetime
+from datetime import datetime, timedelta
 from PIL import Image, ImageDraw, ImageFont
 import io
 import aiohttp
 import json
+import time
+import math
+import heapq
+import itertools
+import sqlite3
+import threading
+import queue
+import mmap
+from collections import deque, Counter
+from enum import Enum
+from contextlib import contextmanager
 
 # Bot token from environment variable
 BOT_TOKEN = os.getenv("ESCROW_BOT_TOKEN", "")
@@ -27,18 +40,175 @@ API_ID = os.getenv("TELEGRAM_API_ID", "")
 API_HASH = os.getenv("TELEGRAM_API_HASH", "")
 PHONE = os.getenv("TELEGRAM_PHONE", "")
 
+# Additional Pyrogram user accounts for parallel group creation
+# Comma-separated entries of "session_name:api_id:api_hash:phone"
+USER_SESSIONS_STR = os.getenv("TELEGRAM_USER_SESSIONS", "")
+USER_SESSIONS = [entry.strip().split(":") for entry in USER_SESSIONS_STR.split(",") if entry.strip()]
+
+# Accounts failing this many creations in a row are rested for USER_ACCOUNT_COOLDOWN seconds
+USER_ACCOUNT_MAX_FAILURES = int(os.getenv("USER_ACCOUNT_MAX_FAILURES", "3"))
+USER_ACCOUNT_COOLDOWN = float(os.getenv("USER_ACCOUNT_COOLDOWN", "120"))
+
+# Seconds between keepalive pings of idle user accounts, and the limit on one connect-and-ping
+USER_ACCOUNT_KEEPALIVE_INTERVAL = float(os.getenv("USER_ACCOUNT_KEEPALIVE_INTERVAL", "60"))
+USER_ACCOUNT_CHECK_TIMEOUT = float(os.getenv("USER_ACCOUNT_CHECK_TIMEOUT", "20"))
+
+# Minimum seconds between group creations started on the same account
+USER_ACCOUNT_MIN_INTERVAL = float(os.getenv("USER_ACCOUNT_MIN_INTERVAL", "3"))
+
+# Group creation queue: waiting jobs beyond GROUP_QUEUE_MAX are turned away
+GROUP_QUEUE_MAX = int(os.getenv("GROUP_QUEUE_MAX", "30"))
+GROUP_QUEUE_TIMEOUT = float(os.getenv("GROUP_QUEUE_TIMEOUT", "300"))  # seconds a job may wait for a user account
+GROUP_QUEUE_MAX_ATTEMPTS = 3
+
 # Admin user IDs (comma-separated)
 ADMIN_IDS_STR = os.getenv("ADMIN_IDS", "7472359048,7880967664,8453993167,2001575810,5825027777,6864194951,8093808661,5229586098,7962772947")
 ADMIN_IDS = [int(admin_id.strip()) for admin_id in ADMIN_IDS_STR.split(",") if admin_id.strip()]
 
-# Blockchain API keys
-BSCSCAN_API_KEY = os.getenv("BSCSCAN_API_KEY", "")
-TRONGRID_API_KEY = os.getenv("TRONGRID_API_KEY", "")
+# Blockchain API keys (comma-separated, calls rotate across the pool)
+BSCSCAN_API_KEYS = [key.strip() for key in os.getenv("BSCSCAN_API_KEY", "").split(",") if key.strip()]
+TRONGRID_API_KEYS = [key.strip() for key in os.getenv("TRONGRID_API_KEY", "").split(",") if key.strip()]
+
+# Explorer rate limits: requests per second allowed per key and across a provider's whole pool,
+# a key answered with a rate-limit response rests API_KEY_COOLDOWN seconds and the call moves to another key
+BSCSCAN_RATE_PER_KEY = float(os.getenv("BSCSCAN_RATE_PER_KEY", "5"))
+BSCSCAN_RATE_LIMIT = float(os.getenv("BSCSCAN_RATE_LIMIT", "20"))
+TRONGRID_RATE_PER_KEY = float(os.getenv("TRONGRID_RATE_PER_KEY", "15"))
+TRONGRID_RATE_LIMIT = float(os.getenv("TRONGRID_RATE_LIMIT", "50"))
+API_KEY_COOLDOWN = float(os.getenv("API_KEY_COOLDOWN", "30"))
+API_KEY_MAX_ATTEMPTS = int(os.getenv("API_KEY_MAX_ATTEMPTS", "3"))
+
+# Explorer circuit breakers: BREAKER_FAILURE_THRESHOLD failures in a row open a provider's circuit for a jittered
+# delay doubling from BREAKER_BASE_DELAY up to BREAKER_MAX_DELAY seconds, then one probe request decides whether it closes
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_BASE_DELAY = float(os.getenv("BREAKER_BASE_DELAY", "5"))
+BREAKER_MAX_DELAY = float(os.getenv("BREAKER_MAX_DELAY", "300"))
+
+# Explorer providers polled per address by the deposit monitor
+MONITOR_PROVIDERS = {'BSC': "bscscan", 'TRON': "trongrid"}
+
+# Deposit monitor: each address is polled every MONITOR_FAST_INTERVAL seconds after /deposit or Check Payment,
+# backing off x2 up to MONITOR_MAX_INTERVAL, and goes cold MONITOR_COLD_GRACE seconds after its deposit window.
+# Checks run concurrently up to MONITOR_CONCURRENCY requests per explorer, a cycle never waits longer than MONITOR_CYCLE_DEADLINE
+MONITOR_FAST_INTERVAL = float(os.getenv("MONITOR_FAST_INTERVAL", "5"))
+MONITOR_MAX_INTERVAL = float(os.getenv("MONITOR_MAX_INTERVAL", "60"))
+MONITOR_COLD_GRACE = float(os.getenv("MONITOR_COLD_GRACE", "300"))
+MONITOR_CONCURRENCY = int(os.getenv("MONITOR_CONCURRENCY", "5"))
+MONITOR_CYCLE_DEADLINE = float(os.getenv("MONITOR_CYCLE_DEADLINE", "20"))
+
+# Minutes a deposit address stays valid after /deposit
+DEPOSIT_WINDOW_MINUTES = 20
+
+# Shared HTTP client for blockchain explorer calls
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+
+# TronGrid pagination: transfers per page and pages followed per poll
+TRON_PAGE_SIZE = 200
+TRON_MAX_PAGES = 10
 
 # USDT contract addresses
 BSC_USDT_CONTRACT = "0x55d398326f99059fF775485246999027B3197955"
 TRON_USDT_CONTRACT = "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t"
 
+# Seconds a live balance lookup is reused for Check Payment and /balance
+BALANCE_CACHE_TTL = float(os.getenv("BALANCE_CACHE_TTL", "5"))
+
+# USDT decimals and display names per network
+USDT_DECIMALS = {'BSC': 18, 'TRON': 6}
+USDT_TOKEN_NAMES = {'BSC': "BSC-USD", 'TRON': "TRON-USDT"}
+
+# BSC watcher mode: "explorer" polls BscScan per address, "logs" scans Transfer logs for all addresses at once
+BSC_WATCHER_MODE = os.getenv("BSC_WATCHER_MODE", "explorer")
+BSC_RPC_URL = os.getenv("BSC_RPC_URL", "https://bsc-dataseed.binance.org")
+BSC_LOG_BLOCK_RANGE = int(os.getenv("BSC_LOG_BLOCK_RANGE", "500"))
+BSC_LOG_CONFIRMATIONS = int(os.getenv("BSC_LOG_CONFIRMATIONS", "3"))
+BSC_LOG_SCAN_INTERVAL = float(os.getenv("BSC_LOG_SCAN_INTERVAL", "5"))
+ERC20_TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+ERC20_BALANCE_OF_SELECTOR = "0x70a08231"
+
+# TRON watcher mode: "explorer" polls TronGrid per address, "events" scans USDT Transfer events for all addresses at once
+TRON_WATCHER_MODE = os.getenv("TRON_WATCHER_MODE", "explorer")
+TRONGRID_BASE_URL = os.getenv("TRONGRID_BASE_URL", "https://api.trongrid.io")
+TRON_EVENT_MAX_PAGES = int(os.getenv("TRON_EVENT_MAX_PAGES", "50"))
+TRON_EVENT_SCAN_INTERVAL = float(os.getenv("TRON_EVENT_SCAN_INTERVAL", "5"))
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+# Per-deal deposit addresses: watch-only account-level extended public keys (m/44'/60'/0' for BSC, m/44'/195'/0' for TRON).
+# Each deal gets the address at <account>/0/<transaction ID>, so the wallet holding the private keys can sweep it.
+# A network without an xpub falls back to its single shared escrow address
+ESCROW_XPUBS = {
+    'BSC': os.getenv("BSC_ESCROW_XPUB", ""),
+    'TRON': os.getenv("TRON_ESCROW_XPUB", "")
+}
+ESCROW_FALLBACK_ADDRESSES = {
+    'BSC': os.getenv("BSC_ESCROW_ADDRESS", "0xDA4c2a5B876b0c7521e1c752690D8705080000fE"),
+    'TRON': os.getenv("TRON_ESCROW_ADDRESS", "TVsTYwseYdRXUKk2ehcEcTT4UU3b2tqrVm")
+}
+
+# secp256k1 curve: field prime, group order and generator point
+SECP256K1_P = 2 ** 256 - 2 ** 32 - 977
+SECP256K1_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+SECP256K1_G = (
+    0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+    0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8
+)
+
+# Deal store: SQLite file holding deals and watched addresses, written behind every DEAL_STORE_FLUSH_INTERVAL seconds
+DEAL_STORE_PATH = os.getenv("DEAL_STORE_PATH", "escrow_deals.db")
+DEAL_STORE_FLUSH_INTERVAL = float(os.getenv("DEAL_STORE_FLUSH_INTERVAL", "0.5"))
+DEAL_STORE_INDEX_COLUMNS = ('chat_id', 'transaction_id')
+DEAL_MEMORY_SAMPLE = 200  # deals measured for the per-deal memory figure in /opstats
+
+# Warm restart: live deals, watched addresses and scanner cursors are restored from a snapshot rewritten every
+# DEAL_SNAPSHOT_INTERVAL seconds plus the append-only journal of changes since, instead of from the whole store
+DEAL_SNAPSHOT_PATH = os.getenv("DEAL_SNAPSHOT_PATH", DEAL_STORE_PATH + ".snapshot")
+DEAL_JOURNAL_PATH = os.getenv("DEAL_JOURNAL_PATH", DEAL_STORE_PATH + ".journal")
+DEAL_SNAPSHOT_INTERVAL = float(os.getenv("DEAL_SNAPSHOT_INTERVAL", "300"))
+
+# Group pool: prepared escrow groups kept on standby per deal type
+GROUP_POOL_SIZE = int(os.getenv("GROUP_POOL_SIZE", "3"))
+GROUP_POOL_REFILL_INTERVAL = float(os.getenv("GROUP_POOL_REFILL_INTERVAL", "30"))  # seconds between pooled group creations
+
+# Deal lifecycle: open -> funded -> released/refunded, or open -> idle -> expired when nothing happens.
+# Idle deals leave memory until their group sees activity again; finished and expired deals are archived
+# and their group returns to the pool. Funded deals never expire.
+# Limitation: nothing moves a deal from funded to released or refunded yet (there are no /release or
+# /refund handlers), so funded deals stay in memory for good.
+DEAL_IDLE_TTL = float(os.getenv("DEAL_IDLE_TTL", "3600"))
+GROUP_RECYCLE_IDLE_TTL = float(os.getenv("GROUP_RECYCLE_IDLE_TTL", "86400"))  # idle this long -> expired
+DEAL_LIFECYCLE_INTERVAL = float(os.getenv("DEAL_LIFECYCLE_INTERVAL", "60"))
+
+# Invite links: pooled groups carry a pre-minted link, disputes reuse one admin link per chat
+INVITE_LINK_REFRESH_INTERVAL = float(os.getenv("INVITE_LINK_REFRESH_INTERVAL", "300"))
+INVITE_LINK_MAX_AGE = float(os.getenv("INVITE_LINK_MAX_AGE", "86400"))
+DISPUTE_LINK_MAX_AGE = float(os.getenv("DISPUTE_LINK_MAX_AGE", "172800"))
+
+# Group provisioning: each step is confirmed by polling with backoff, bounded per step
+PROVISION_STEP_TIMEOUT = float(os.getenv("PROVISION_STEP_TIMEOUT", "15"))
+PROVISION_POLL_MIN_DELAY = 0.1
+PROVISION_POLL_MAX_DELAY = 1.0
+
+# Escrow group titles per deal type
+ESCROW_GROUP_TITLES = {
+    'p2p': "P2P Escrow By PAGAL Bot",
+    'otc': "OTC Escrow By PAGAL Bot",
+}
+
+# Escrow type buttons and the deal type they provision
+ESCROW_CALLBACK_DEAL_TYPES = {
+    'escrow_p2p': 'p2p',
+    'escrow_product': 'otc',
+}
+
+# Group provisioning stages, in pipeline order, and their latency histogram buckets (seconds)
+PROVISION_STAGES = ('create', 'add_bot', 'promote_bot', 'promote_self', 'confirm_admin', 'welcome_pin', 'cleanup', 'leave', 'invite_link', 'total')
+STAGE_HISTOGRAM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
 # Initialize Pyrogram user client (for group creation)
 user_client = None
 if API_ID and API_HASH and PHONE:
@@ -49,11 +219,544 @@ if API_ID and API_HASH and PHONE:
         phone_number=PHONE
     )
 
+# Pool of user accounts that group creation is scheduled across
+user_accounts = []  # [{'name': ..., 'client': ..., 'active': 0, 'flood_until': 0, ...}]
+
+def register_user_account(name, client):
+    """Add a Pyrogram client to the group-creation account pool"""
+    user_accounts.append({
+        'name': name,
+        'client': client,
+        'active': 0,
+        'created': 0,
+        'failures': 0,
+        'consecutive_failures': 0,
+        'flood_until': 0.0,
+        'unhealthy_until': 0.0,
+        'next_start': 0.0,
+        'me': None,
+        'ready': False,
+        'last_ping': None,
+        'reconnects': 0,
+        'last_error': None
+    })
+
+if user_client:
+    register_user_account("escrow_user_session", user_client)
+
+for session_name, session_api_id, session_api_hash, session_phone in USER_SESSIONS:
+    register_user_account(session_name, Client(
+        session_name,
+        api_id=int(session_api_id),
+        api_hash=session_api_hash,
+        phone_number=session_phone
+    ))
+
+class TrackedDict(dict):
+    """Dict inside a deal store record that marks the record dirty when changed"""
+    __slots__ = ('_root', '_table', '_key')
+    
+    def __init__(self, root=None):
+        super().__init__()
+        self._root = self if root is None else root
+        self._table = None
+        self._key = None
+    
+    def changed(self):
+        root = self._root
+        if root._table is not None:
+            root._table.mark_dirty(root._key, root)
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, track_value(value, self._root))
+        # Transient fields (e.g. monotonic schedule times) are not worth a write
+        if self is not self._root or self._table is None or key not in self._table.transient:
+            self.changed()
+    
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+    
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+class TrackedSet(set):
+    """Set inside a deal store record that marks the record dirty when changed"""
+    __slots__ = ('_root',)
+    
+    def __init__(self, items=(), root=None):
+        super().__init__(items)
+        self._root = root
+    
+    def changed(self):
+        if self._root is not None:
+            self._root.changed()
+
+def tracked_mutator(base, name):
+    """Wrap a container mutator so it marks its record dirty"""
+    method = getattr(base, name)
+    def mutate(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self.changed()
+        return result
+    return mutate
+
+for mutator_name in ('__delitem__', 'pop', 'popitem', 'clear'):
+    setattr(TrackedDict, mutator_name, tracked_mutator(dict, mutator_name))
+for mutator_name in ('add', 'discard', 'remove', 'pop', 'clear', 'update', 'difference_update', 'intersection_update',
+                     'symmetric_difference_update', '__ior__', '__iand__', '__isub__', '__ixor__'):
+    setattr(TrackedSet, mutator_name, tracked_mutator(set, mutator_name))
+
+def track_value(value, root):
+    """Convert nested dicts and sets into tracked containers of a record"""
+    if isinstance(value, dict):
+        tracked = TrackedDict(root)
+        for key, item in value.items():
+            dict.__setitem__(tracked, key, track_value(item, root))
+        return tracked
+    if isinstance(value, set):
+        return TrackedSet(value, root)
+    return value
+
+class Token(str, Enum):
+    """Token a deal is settled in"""
+    USDT = "USDT"
+    BTC = "BTC"
+    LTC = "LTC"
+    
+    def __str__(self):
+        return self.value
+
+class Network(str, Enum):
+    """Chain a deal is settled on"""
+    BSC = "BSC"
+    TRON = "TRON"
+    BTC = "BTC"
+    LTC = "LTC"
+    
+    def __str__(self):
+        return self.value
+
+class DealState(str, Enum):
+    """Lifecycle state of a deal"""
+    OPEN = "open"
+    FUNDED = "funded"
+    RELEASED = "released"
+    REFUNDED = "refunded"
+    IDLE = "idle"
+    EXPIRED = "expired"
+    
+    def __str__(self):
+        return self.value
+
+# States the idle clock no longer moves a deal out of, and the states that end a deal
+SETTLED_DEAL_STATES = (DealState.FUNDED, DealState.RELEASED, DealState.REFUNDED)
+FINISHED_DEAL_STATES = (DealState.RELEASED, DealState.REFUNDED, DealState.EXPIRED)
+
+class Record:
+    """Slotted deal store record with dict-style access for handlers that still index it by field name"""
+    __slots__ = ('_root', '_table', '_key')
+    fields = ()
+    converters = {}  # {field: callable(value, root)} applied on assignment
+    defaults = {}  # {field: value} set on creation when not given
+    
+    def __init__(self, root=None, **values):
+        object.__setattr__(self, '_root', self if root is None else root)
+        object.__setattr__(self, '_table', None)
+        object.__setattr__(self, '_key', None)
+        for field, value in self.defaults.items():
+            object.__setattr__(self, field, value)
+        for field, value in values.items():
+            object.__setattr__(self, field, self.convert(field, value))
+    
+    def convert(self, field, value):
+        converter = self.converters.get(field)
+        if converter is not None and value is not None:
+            return converter(value, self._root)
+        return track_value(value, self._root)
+    
+    def changed(self):
+        root = self._root
+        if root._table is not None:
+            root._table.mark_dirty(root._key, root)
+    
+    def __setattr__(self, field, value):
+        object.__setattr__(self, field, self.convert(field, value))
+        # Transient fields (e.g. monotonic schedule times) are not worth a write
+        if self is not self._root or self._table is None or field not in self._table.transient:
+            self.changed()
+    
+    def __delattr__(self, field):
+        object.__delattr__(self, field)
+        self.changed()
+    
+    def to_dict(self):
+        """Return the set fields as a plain dict, nested records included"""
+        return {field: value.to_dict() if isinstance(value, Record) else value for field, value in self.items()}
+    
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+    
+    # Dict-compatible access, unset fields behave like missing keys
+    def __getitem__(self, field):
+        if field not in self.fields:
+            raise KeyError(field)
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+    
+    def __setitem__(self, field, value):
+        if field not in self.fields:
+            raise KeyError(field)
+        setattr(self, field, value)
+    
+    def __delitem__(self, field):
+        try:
+            delattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+    
+    def __contains__(self, field):
+        return field in self.fields and hasattr(self, field)
+    
+    def __iter__(self):
+        return iter(self.keys())
+    
+    def __len__(self):
+        return len(self.keys())
+    
+    def get(self, field, default=None):
+        return getattr(self, field, default) if field in self.fields else default
+    
+    def setdefault(self, field, default=None):
+        if field not in self:
+            self[field] = default
+        return self[field]
+    
+    def pop(self, field, *default):
+        if field in self:
+            value = getattr(self, field)
+            delattr(self, field)
+            return value
+        if default:
+            return default[0]
+        raise KeyError(field)
+    
+    def update(self, *args, **kwargs):
+        for field, value in dict(*args, **kwargs).items():
+            self[field] = value
+    
+    def keys(self):
+        return [field for field in self.fields if hasattr(self, field)]
+    
+    def values(self):
+        return [getattr(self, field) for field in self.keys()]
+    
+    def items(self):
+        return [(field, getattr(self, field)) for field in self.keys()]
+
+def nested_record(record_type):
+    """Converter that turns a dict, or a record of another deal, into a record owned by this one"""
+    def convert(value, root):
+        if isinstance(value, Record):
+            value = value.to_dict()
+        return record_type(root, **value)
+    return convert
+
+class Party(Record):
+    """Buyer or seller of a deal"""
+    __slots__ = fields = ('user_id', 'username', 'address', 'has_bot_in_bio')
+
+class Deal(Record):
+    """One escrow deal, keyed by its group chat in escrow_roles"""
+    __slots__ = fields = (
+        'buyer', 'seller', 'token', 'selected_token', 'selected_network', 'token_initiator', 'transaction_id',
+        'trade_start_time', 'last_deposit_time', 'deposit_message_id', 'invite_link', 'last_activity',
+        'members', 'group_renamed', 'status', 'group_type'
+    )
+    converters = {
+        'buyer': nested_record(Party),
+        'seller': nested_record(Party),
+        'token': lambda value, root: Token(value),
+        'selected_token': lambda value, root: Token(value),
+        'selected_network': lambda value, root: Network(value),
+        'status': lambda value, root: DealState(value)
+    }
+
+class WatchedAddress(Record):
+    """Deposit address watched by the monitor, keyed by address in monitored_addresses"""
+    __slots__ = fields = (
+        'chat_id', 'transaction_id', 'network', 'token', 'network_label', 'total_balance', 'last_check',
+        'window_ends', 'next_check', 'poll_interval', 'cold', 'bsc_cursor', 'tron_cursor'
+    )
+    converters = {
+        'network': lambda value, root: Network(value),
+        'token': lambda value, root: Token(value)
+    }
+    defaults = {
+        'transaction_id': None, 'total_balance': 0, 'window_ends': None, 'next_check': None,
+        'poll_interval': MONITOR_FAST_INTERVAL, 'cold': False
+    }
+
+def track_record(value, table, key):
+    """Bind a value stored in a deal store table to its row, tracking changes inside it"""
+    if table.record_type is not None and isinstance(value, (dict, Record)):
+        # An unbound record of the right type is adopted as is, anything else is copied into one
+        if type(value) is table.record_type and value._root is value and value._table is None:
+            record = value
+        else:
+            record = table.record_type(**(value.to_dict() if isinstance(value, Record) else value))
+    elif isinstance(value, dict):
+        record = TrackedDict()
+        for field, item in value.items():
+            dict.__setitem__(record, field, track_value(item, record))
+    else:
+        return value
+    object.__setattr__(record, '_table', table)
+    object.__setattr__(record, '_key', key)
+    return record
+
+def deep_sizeof(value, seen=None):
+    """Bytes held by a value and everything it references, skipping enum members and field-name keys shared by all deals"""
+    if seen is None:
+        seen = set()
+    if id(value) in seen or isinstance(value, Enum) or value is None or isinstance(value, bool):
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, Record):
+        size += sum(deep_sizeof(item, seen) for item in value.values())
+    elif isinstance(value, dict):
+        size += sum(deep_sizeof(item, seen) + (0 if isinstance(key, str) else deep_sizeof(key, seen)) for key, item in value.items())
+    elif isinstance(value, (set, list, tuple)):
+        size += sum(deep_sizeof(item, seen) for item in value)
+    return size
+
+class DealStoreTable(dict):
+    """In-memory cache of a deal store table: writes are queued for the writer thread, misses read through to SQLite"""
+    def __init__(self, name, key_type, index_columns, preload=False, transient=(), record_type=None, read_through=True):
+        super().__init__()
+        self.name = name
+        self.record_type = record_type
+        self.key_type = key_type
+        self.index_columns = index_columns  # (key, value) -> (chat_id, transaction_id)
+        self.preload = preload
+        self.transient = set(transient)
+        self.read_through = read_through  # False for preloaded tables that never evict, so misses skip SQLite
+        self.dirty = set()
+        self.unsynced = {}  # {key: version} queued but not yet committed
+        self.missing = set()  # keys known to be absent, including deletions not yet committed
+        self.evicted = set()  # preloaded keys dropped from memory since the last flush, to be journaled
+    
+    def mark_dirty(self, key, record):
+        # Changes to a record already replaced or removed must not be written back
+        if dict.get(self, key) is record:
+            self.dirty.add(key)
+    
+    def load(self, key):
+        """Read a row missing from memory out of SQLite, caching the result either way"""
+        reader = deal_store['reader']
+        if key in self.missing or reader is None or not self.read_through:
+            return None
+        row = reader.execute(f"SELECT data FROM {self.name} WHERE key = ?", (str(key),)).fetchone()
+        if row is None:
+            self.missing.add(key)
+            return None
+        deal_store_stats['loads'] += 1
+        value = track_record(decode_store_value(row[0]), self, key)
+        dict.__setitem__(self, key, value)
+        return value
+    
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or self.load(key) is not None
+    
+    def __getitem__(self, key):
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        value = self.load(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+    
+    def get(self, key, default=None):
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        value = self.load(key)
+        return default if value is None else value
+    
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, track_record(value, self, key))
+        self.missing.discard(key)
+        self.dirty.add(key)
+    
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+    
+    def pop(self, key, *default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = dict.pop(self, key)
+        if isinstance(value, (TrackedDict, Record)):
+            object.__setattr__(value, '_table', None)
+        self.missing.add(key)
+        self.dirty.add(key)
+        return value
+    
+    def __delitem__(self, key):
+        self.pop(key)
+    
+    def evict(self, key):
+        """Drop a row from memory while keeping it in SQLite; refused while it has changes not yet committed"""
+        if key in self.dirty or key in self.unsynced or not dict.__contains__(self, key):
+            return False
+        value = dict.pop(self, key)
+        if isinstance(value, (TrackedDict, Record)):
+            object.__setattr__(value, '_table', None)
+        # The snapshot and journal hold preloaded rows, so they must learn the row left memory
+        if self.preload:
+            self.evicted.add(key)
+        return True
+    
+    def forget_missing(self):
+        """Drop cached misses whose absence is already committed, so SQLite answers for them again"""
+        self.missing.intersection_update(self.dirty | set(self.unsynced))
+    
+    def find_keys(self, column, value):
+        """Return keys whose chat_id or transaction_id column equals value, using the SQLite index"""
+        position = DEAL_STORE_INDEX_COLUMNS.index(column)
+        candidates = set(self.dirty) | set(self.unsynced)
+        reader = deal_store['reader']
+        if reader is not None:
+            rows = reader.execute(f"SELECT key FROM {self.name} WHERE {column} = ?", (value,))
+            candidates.update(self.key_type(row[0]) for row in rows)
+        
+        # Rows written before their latest change are checked against memory
+        keys = []
+        for key in candidates:
+            record = self.get(key)
+            if record is not None and self.index_columns(key, record)[position] == value:
+                keys.append(key)
+        return keys
+
 # Track buyer and seller declarations per chat
-escrow_roles = {}  # {chat_id: {'buyer': {...}, 'seller': {...}}}
+escrow_roles = DealStoreTable(
+    "deals", int, lambda chat_id, deal: (chat_id, deal.get('transaction_id')), preload=True, record_type=Deal
+)  # {chat_id: {'buyer': {...}, 'seller': {...}}}
+
+# Track monitored addresses for deposit detection; keyed by per-deal deposit address, this is also the
+# address-to-deal index every credit, Check Payment and scanner match resolves through
+monitored_addresses = DealStoreTable(
+    "watched_addresses", str, lambda address, info: (info.chat_id, info.transaction_id),
+    preload=True, transient=('next_check',), record_type=WatchedAddress
+)  # {address: {'chat_id': ..., 'network': ..., 'last_check': ..., 'total_balance': 0}}
+
+# Chat of every transaction ID issued, so IDs are never reused
+transaction_chats = DealStoreTable(
+    "transaction_chats", int, lambda transaction_id, chat_id: (chat_id, transaction_id)
+)  # {transaction_id: chat_id}
+
+# Saved positions of the log and event scanners, so they resume where they stopped
+scanner_cursors = DealStoreTable(
+    "scanner_cursors", str, lambda name, cursor: (None, None), preload=True, read_through=False
+)  # {'bsc_logs': {...}, 'tron_events': {...}}
+
+# Idle deals evicted from memory, kept small so the lifecycle manager can expire them without loading them
+idle_deals = DealStoreTable(
+    "idle_deals", int, lambda chat_id, last_activity: (chat_id, None), preload=True, read_through=False
+)  # {chat_id: last_activity}
+
+# Finished and expired deals with the addresses they used, kept on disk only; deals that never got a
+# transaction ID (e.g. /buyer in a chat the bot merely sits in) are keyed by chat and archive time
+deal_archive = DealStoreTable(
+    "deal_archive", str, lambda key, entry: (entry['chat_id'], entry['deal'].get('transaction_id'))
+)  # {transaction_id or 'chat_id@archived_at': {'chat_id': ..., 'state': ..., 'archived_at': ..., 'deal': {...}, 'addresses': {...}}}
+
+# Prepared groups on standby, so a restart re-adopts them instead of orphaning them with live invite links
+pooled_groups = DealStoreTable(
+    "pooled_groups", int, lambda chat_id, entry: (chat_id, None), preload=True, read_through=False
+)  # {chat_id: {'chat_id': ..., 'deal_type': ..., 'created_at': ..., 'invite_link': ..., 'link_created_at': ...}}
+
+# Deal store connection, writer thread and counters; preloaded tables are the ones journaled and snapshotted
+deal_store_tables = [
+    escrow_roles, monitored_addresses, transaction_chats, scanner_cursors, idle_deals, deal_archive, pooled_groups
+]
+deal_store = {'reader': None, 'jobs': None, 'writer': None, 'versions': itertools.count(1), 'sequence': 0}
+deal_store_stats = {
+    'flushes': 0, 'rows_written': 0, 'write_errors': 0, 'loads': 0,
+    'snapshots': 0, 'restore_ms': 0.0, 'replayed': 0
+}
+
+# Derived deposit addresses and the decoded <account>/0 chain node per network
+derived_deposit_addresses = {}  # {(network, index): address}
+deposit_chain_nodes = {}  # {network: {'chain_code': ..., 'key': ...}}
+
+# Process-wide HTTP session, created in post_init and closed in post_shutdown
+http_session = None
+
+# Concurrent explorer requests allowed per network
+provider_semaphores = {network: asyncio.Semaphore(MONITOR_CONCURRENCY) for network in ("BSC", "TRON")}
+monitor_stats = {'cycles': 0, 'checks': 0, 'timeouts': 0, 'last_cycle_seconds': 0.0}
+
+# Token buckets and key pools per explorer, TronGrid falls back to one anonymous key
+api_provider_buckets = {}  # {provider: bucket}
+api_key_pools = {}  # {provider: [{'key': ..., 'bucket': ..., 'cooldown_until': ..., 'calls': 0, ...}]}
+
+# Circuit breaker per explorer endpoint: closed, open until retry_at, or half_open while one probe is in flight
+circuit_breakers = {
+    provider: {'state': 'closed', 'failures': 0, 'opens': 0, 'retry_at': 0, 'trips': 0, 'short_circuited': 0}
+    for provider in ("bscscan", "trongrid", "bsc_rpc")
+}
 
-# Track monitored addresses for deposit detection
-monitored_addresses = {}  # {address: {'chat_id': ..., 'network': ..., 'last_check': ..., 'total_balance': 0}}
+# Deposit check schedule, a min-heap of (due monotonic time, sequence, address)
+monitor_schedule = []
+monitor_sequence = itertools.count()
+monitor_wakeup = asyncio.Event()
+
+# Live balance lookups: short-lived cache and lookups in flight
+balance_cache = {}  # {address: {'balance': ..., 'fetched_at': ...}}
+balance_lookups = {}  # {address: asyncio.Future}
+
+# Log-scan watcher position and counters (BSC_WATCHER_MODE = "logs")
+bsc_log_cursor = {'last_block': None}
+bsc_log_stats = {'ranges': 0, 'matched': 0, 'errors': 0}
+
+# Event-scan watcher position and counters (TRON_WATCHER_MODE = "events")
+tron_event_cursor = {'min_timestamp': None, 'seen': set()}
+tron_event_stats = {'pages': 0, 'matched': 0, 'errors': 0}
+
+# Prepared escrow groups waiting to be handed out
+group_pool = {deal_type: [] for deal_type in ESCROW_GROUP_TITLES}  # {deal_type: [{'chat_id': ..., 'created_at': ...}]}
+group_pool_pending = {deal_type: 0 for deal_type in ESCROW_GROUP_TITLES}  # creations in flight per deal type
+group_pool_stats = {'hits': 0, 'misses': 0, 'created': 0, 'failed': 0, 'recycled': 0, 'recycle_failed': 0, 'discarded': 0}
+deal_lifecycle_stats = {'sweeps': 0, 'idle_evicted': 0, 'archived': 0, 'addresses_evicted': 0}
+
+# Cached Telegram identities, resolved at startup and refreshed on error
+identity_cache = {'bot': None}
+
+# Reusable admin invite links for /dispute
+dispute_invite_links = {}  # {chat_id: {'invite_link': ..., 'created_at': ...}}
+invite_link_stats = {'minted': 0, 'revoked': 0, 'served_ready': 0, 'served_fresh': 0, 'dispute_cached': 0, 'dispute_created': 0}
+
+# On-demand group creations waiting for a user account
+group_creation_jobs = deque()  # [{'deal_type': ..., 'future': ..., 'position': ...}]
+group_creation_wakeup = asyncio.Event()
+group_queue_stats = {'queued': 0, 'completed': 0, 'retried': 0, 'shed': 0}
+
+# Groups being provisioned, woken when the bot's own membership changes
+bot_membership_events = {}  # {chat_id: asyncio.Event}
+
+# Latency histograms per provisioning stage
+stage_timings = {
+    stage: {'buckets': [0] * (len(STAGE_HISTOGRAM_BUCKETS) + 1), 'count': 0, 'sum': 0.0, 'max': 0.0, 'errors': 0}
+    for stage in PROVISION_STAGES
+}
 
 def generate_referral_code(user_id):
     """Generate a unique referral code for a user based on their ID"""
@@ -181,9 +884,8 @@ async def dispute_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Create an invite link for the group
     try:
-        # Create invite link with no member limit (admins can join)
-        chat_invite = await context.bot.create_chat_invite_link(chat_id=chat.id)
-        invite_link = chat_invite.invite_link
+        # Reuse the chat's admin invite link (no member limit, admins can join)
+        invite_link = await get_dispute_invite_link(context.bot, chat.id)
         
         # Get group title
         group_title = chat.title or "Escrow Group"
@@ -227,458 +929,1021 @@ Remember without it disputes wouldn't be resolved. Once filled proceed with Spec
     
     await update.message.reply_text(dd_message, parse_mode='HTML')
 
-async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle button callbacks"""
-    query = update.callback_query
-    await query.answer()
-    
-    if query.data == "commands_list":
-        commands_message = """📌 AVAILABLE COMMANDS
+# Welcome message pinned in every new escrow group
+GROUP_WELCOME_TEXT = """📍 Hey there traders! Welcome to our escrow service.
+✅ Please start with /dd command and fill the DealInfo Form"""
 
-Here you have a full command list, incase you do like to move through the bot using commands instead of the buttons.
+class NoUserAccountAvailable(Exception):
+    """Raised when every user account is flood-waited, unhealthy or paced"""
+    def __init__(self, value):
+        self.value = max(1, math.ceil(value))
+        super().__init__(f"All user accounts are busy, retry in {self.value} seconds")
 
-/start - A command to start interacting with the bot
-/whatisescrow - A command to tell you more about escrow
-/instructions - A command with text instructions
-/terms - A command to bring out our TOS
-/dispute - A command to contact the admins
-/menu - A command to bring out a menu for the bot
-/contact - A command to get admin's contact
-/commands - A command to get commands list
-/stats - A command to check user stats
-/vouch - A command to vouch for the bot
-/newdeal - A command to start a new deal
-/tradeid - A command to get trade id for a chat
-/dd - A command to add deal details
-/escrow - A command to get a escrow group link
-/token - A command to select token for the escrow
-/deposit - A command to generate deposit address
-/verify - A command to verify wallet address.
-/dispute - A command to raise a dispute request
-/balance - A command to check the balance of the escrow address
-/release - A command to release the funds in the escrow
-/refund - A command to refund the funds in the escrow
-/seller - A command to set the seller
-/buyer - A command to set the buyer
-/setfee - A command to set custom trade fee
-/save - A command to save default addresses for various chains.
-/saved - A command to check saved addresses
-/referral - A command to check your referrals"""
-        
-        keyboard = [[InlineKeyboardButton("BACK", callback_data="back_to_start")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(commands_message, reply_markup=reply_markup)
-    
-    elif query.data == "contact":
-        contact_message = """☎️ CONTACT ARBITRATOR
+def pick_user_account():
+    """Reserve the least-loaded healthy account that is not flood-waited or paced, or return None"""
+    now = time.monotonic()
+    available = [
+        account for account in user_accounts
+        if account['ready'] and account['flood_until'] <= now
+        and account['unhealthy_until'] <= now and account['next_start'] <= now
+    ]
+    if not available:
+        return None
+    account = min(available, key=lambda account: (account['active'], account['created']))
+    account['next_start'] = now + USER_ACCOUNT_MIN_INTERVAL
+    return account
 
-💬 Type /dispute
+def user_accounts_retry_after():
+    """Seconds until the next flood-waited, unhealthy or paced account becomes usable again"""
+    now = time.monotonic()
+    deadlines = [
+        max(account['flood_until'], account['unhealthy_until'], account['next_start'])
+        if account['ready'] else now + USER_ACCOUNT_KEEPALIVE_INTERVAL
+        for account in user_accounts
+    ]
+    return max(0.1, min(deadlines) - now) if deadlines else 1
 
-💡 Incase you're not getting a response can reach out to @bsr_official"""
-        
-        keyboard = [[InlineKeyboardButton("⬅️ BACK", callback_data="back_to_start")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(contact_message, reply_markup=reply_markup)
+async def run_with_user_account(operation, account=None):
+    """Run operation(account) on the given or scheduled account, tracking its load, FloodWait deadline and health"""
+    if account is None:
+        account = pick_user_account()
+    if not account:
+        raise NoUserAccountAvailable(user_accounts_retry_after())
     
-    elif query.data == "what_is_escrow":
-        await query.answer("**Coming Soon...**", show_alert=True)
+    account['active'] += 1
+    try:
+        # Start user client if not started
+        if not account['client'].is_connected:
+            await account['client'].start()
+        result = await operation(account)
+    except FloodWait as e:
+        account['flood_until'] = time.monotonic() + e.value
+        account['last_error'] = f"FloodWait {e.value}s"
+        print(f"User account {account['name']} flood-waited for {e.value} seconds")
+        raise
+    except Exception as e:
+        account['failures'] += 1
+        account['consecutive_failures'] += 1
+        account['last_error'] = str(e)
+        if account['consecutive_failures'] >= USER_ACCOUNT_MAX_FAILURES:
+            account['unhealthy_until'] = time.monotonic() + USER_ACCOUNT_COOLDOWN
+            print(f"User account {account['name']} marked unhealthy for {USER_ACCOUNT_COOLDOWN:.0f} seconds")
+        raise
+    finally:
+        account['active'] -= 1
     
-    elif query.data == "instructions":
-        instructions_message = """📘 GUIDE " HOW TO USE @PagaLEscrowBot ( Escrow Bot ) " FOR SAFE AND FASTEST HASSLE-FREE ESCROW 🚀  
-
-Step 1 : Use /escrow command in the DM of the Bot.  
-( It will auto-create a safe escrow group and drop the link so that buyer and seller can join via that link. ) 🔗👥  
+    account['created'] += 1
+    account['consecutive_failures'] = 0
+    return result
 
-Step 2 : Use /dd command to initiate the process of escrow where you will get the format to express your deal and info.  
-( It will include quantity, rate, TnC's agreed upon by both parties. ) 📝🤝  
+class GroupQueueFull(Exception):
+    """Raised when the group creation backlog is at GROUP_QUEUE_MAX"""
 
-Step 3 : Use /buyer ( your address ) if you are a buyer 🛒 or /seller ( your address ) if you are a seller 🏪 to verify address and continue the deal.  
-( Provide your crypto address which will be used in case of release or refund. ) 💳🔐  
+class GroupCreationUnavailable(Exception):
+    """Raised when no user account is connected, or a queued creation waited past GROUP_QUEUE_TIMEOUT"""
 
-Step 4 : Choose the token and network by /token command and then either party has to accept it. ✅💱  
+def notify_queue_positions():
+    """Tell every waiting job whose place in the group creation queue has changed"""
+    for index, job in enumerate(group_creation_jobs):
+        position = index + 1
+        if job['position'] != position:
+            job['position'] = position
+            if job['on_position']:
+                asyncio.create_task(job['on_position'](position))
 
-Step 5 : Use /deposit command to deposit the asset within the bot.  
-( Note : Bot will give the deposit address and it has a time limit to deposit ⏳, you have to deposit within that given time. ) ⏰💸  
+async def queue_group_creation(bot, deal_type, on_position=None):
+    """Queue an on-demand group creation and wait for its bot chat ID"""
+    if len(group_creation_jobs) >= GROUP_QUEUE_MAX:
+        group_queue_stats['shed'] += 1
+        raise GroupQueueFull()
+    # Without a connected account the job would wait forever at position #1
+    if not any(account['ready'] for account in user_accounts):
+        group_queue_stats['shed'] += 1
+        raise GroupCreationUnavailable("No user account is connected, escrow groups cannot be created right now")
+    
+    job = {
+        'bot': bot,
+        'deal_type': deal_type,
+        'future': asyncio.get_running_loop().create_future(),
+        'on_position': on_position,
+        'position': None,
+        'attempts': 0,
+        'deadline': time.monotonic() + GROUP_QUEUE_TIMEOUT
+    }
+    group_creation_jobs.append(job)
+    group_queue_stats['queued'] += 1
+    group_creation_wakeup.set()
+    notify_queue_positions()
+    return await job['future']
 
-Step 6 : Once verified by the bot, you can continue the deal.  
-( Bot will send the real-time deposit details in the chat. ) 📊💬  
+async def run_group_creation_job(job, account):
+    """Provision one queued group on its scheduled account, re-queueing it after a FloodWait"""
+    job['attempts'] += 1
+    try:
+        chat_id = await run_with_user_account(
+            lambda account: prepare_escrow_group(job['bot'], job['deal_type'], account),
+            account
+        )
+    except FloodWait as e:
+        if job['attempts'] < GROUP_QUEUE_MAX_ATTEMPTS:
+            # Retry first in line once any account is out of its flood wait
+            group_queue_stats['retried'] += 1
+            group_creation_jobs.appendleft(job)
+            group_creation_wakeup.set()
+            notify_queue_positions()
+        else:
+            job['future'].set_exception(e)
+        return
+    except Exception as e:
+        job['future'].set_exception(e)
+        return
+    
+    group_queue_stats['completed'] += 1
+    job['future'].set_result(chat_id)
 
-Step 7 : After a successful deal, you can release the asset to the party by using /release ( amount / all ).  
-( Thus, the bot will itself release the asset to the party and send the verification in the chat. ) 🎉💼  
+def expire_group_creation_jobs():
+    """Fail queued jobs past their deadline, or every job once no user account is connected"""
+    now = time.monotonic()
+    connected = any(account['ready'] for account in user_accounts)
+    for job in list(group_creation_jobs):
+        if connected and job['deadline'] > now:
+            continue
+        group_creation_jobs.remove(job)
+        group_queue_stats['shed'] += 1
+        if connected:
+            reason = f"No user account became free within {GROUP_QUEUE_TIMEOUT:.0f} seconds"
+        else:
+            reason = "No user account is connected, escrow groups cannot be created right now"
+        if not job['future'].done():
+            job['future'].set_exception(GroupCreationUnavailable(reason))
+    notify_queue_positions()
 
-🚨 IN CASE OF ANY DISPUTE OR ISSUE, YOU CAN FEEL FREE TO USE /dispute COMMAND, AND SUPPORT WILL JOIN YOU SHORTLY. 🛎️👩‍💻"""
+async def group_creation_dispatcher(bot_app):
+    """Background task that feeds queued group creations to user accounts at a paced rate"""
+    while True:
+        if not group_creation_jobs:
+            group_creation_wakeup.clear()
+            await group_creation_wakeup.wait()
+            continue
         
-        keyboard = [[InlineKeyboardButton("⬅️ BACK", callback_data="back_to_start")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        # Wait until an account is out of its flood wait, cooldown and pacing interval
+        account = pick_user_account()
+        if not account:
+            expire_group_creation_jobs()
+            if group_creation_jobs:
+                next_deadline = min(job['deadline'] for job in group_creation_jobs) - time.monotonic()
+                await asyncio.sleep(max(0.1, min(user_accounts_retry_after(), next_deadline)))
+            continue
         
-        await query.edit_message_text(instructions_message, reply_markup=reply_markup)
-    
-    elif query.data == "terms":
-        terms_message = """📜 TERMS
+        job = group_creation_jobs.popleft()
+        notify_queue_positions()
+        asyncio.create_task(run_group_creation_job(job, account))
 
-Our terms of usage are simple.
+def format_group_queue_stats():
+    """Format group creation queue depth and counters for /opstats"""
+    lines = ["<b>📥 CREATION QUEUE</b>"]
+    lines.append(f"Waiting: {len(group_creation_jobs)}/{GROUP_QUEUE_MAX}")
+    lines.append(
+        f"Queued: {group_queue_stats['queued']} | Completed: {group_queue_stats['completed']} | "
+        f"Retried: {group_queue_stats['retried']} | Shed: {group_queue_stats['shed']}"
+    )
+    return "\n".join(lines)
 
-🎟 Fees
-1.0% for P2P and 1.0% for OTC Flat.
+def format_user_account_stats():
+    """Format per-account load, flood wait and health for /opstats"""
+    now = time.monotonic()
+    lines = ["<b>👤 USER ACCOUNTS</b>"]
+    for account in user_accounts:
+        if account['flood_until'] > now:
+            state = f"flood wait {account['flood_until'] - now:.0f}s"
+        elif account['unhealthy_until'] > now:
+            state = f"unhealthy {account['unhealthy_until'] - now:.0f}s"
+        else:
+            state = "ready"
+        lines.append(
+            f"{account['name']}: {state} | active={account['active']} "
+            f"created={account['created']} failures={account['failures']}"
+        )
+    if not user_accounts:
+        lines.append("No user accounts configured")
+    return "\n".join(lines)
 
-Transactions fee will be applicable.
+async def get_bot_identity(bot):
+    """Return the bot's own User, resolving it once and caching it"""
+    if identity_cache['bot'] is None:
+        identity_cache['bot'] = await bot.get_me()
+    return identity_cache['bot']
 
-TAKE THIS INTO ACCOUNT WHEN DEPOSITING FUNDS
+async def get_user_identity(account):
+    """Return a user account's own User, resolving it once and caching it on the account"""
+    if account['me'] is None:
+        account['me'] = await account['client'].get_me()
+    return account['me']
 
-1️⃣ Record/screenshot the desktop while your perform any testing of logins or data, or recording of physcial items being opened, this is to provide evidence that the data does not work, if the data is working and you are happy to release the funds, you can delete the recording.
+def forget_identities(account=None):
+    """Drop cached identities so they are resolved again on next use"""
+    identity_cache['bot'] = None
+    if account:
+        account['me'] = None
 
-FAILURE TO PRODUCE SUFFICIENT EVIDENCE OF TESTING WILL RESULT IN LOSS OF FUNDS
+async def warm_up_identities(application):
+    """Resolve the bot identity and start and verify every user account at boot"""
+    try:
+        bot_user = await get_bot_identity(application.bot)
+        print(f"✅ Bot identity cached: @{bot_user.username}")
+    except Exception as e:
+        print(f"Error resolving bot identity: {e}")
+    
+    # Connect all accounts concurrently, each MTProto handshake is independent
+    await asyncio.gather(*(check_user_account(account) for account in user_accounts))
+    ready_accounts = sum(1 for account in user_accounts if account['ready'])
+    print(f"✅ User accounts ready: {ready_accounts}/{len(user_accounts)}")
 
-2️⃣ Before you purchase any information, please take the time to learn what you are buying
+async def connect_user_account(account):
+    """Start a user account's client if needed and return its own User"""
+    if not account['client'].is_connected:
+        await account['client'].start()
+    return await account['client'].get_me()
 
-IT IS NOT THE RESPONSIBILITY OF THE SELLER TO EXPLAIN HOW TO USE THE INFORMATION, ALTHOUGH IT MAY HELP MAKE TRANSACTIONS RUN SMOOTHER IF VENDORS HELP BUYERS
+async def check_user_account(account):
+    """Connect a user account if needed and verify its session with a live get_me call, bounded by USER_ACCOUNT_CHECK_TIMEOUT"""
+    try:
+        # A hung MTProto connect or a session waiting for interactive login must not block startup
+        account['me'] = await asyncio.wait_for(connect_user_account(account), USER_ACCOUNT_CHECK_TIMEOUT)
+        account['ready'] = True
+        account['last_ping'] = datetime.now()
+    except asyncio.TimeoutError:
+        account['ready'] = False
+        account['last_error'] = f"No response within {USER_ACCOUNT_CHECK_TIMEOUT:.0f}s"
+        print(f"User account {account['name']} health check timed out after {USER_ACCOUNT_CHECK_TIMEOUT:.0f} seconds")
+    except FloodWait as e:
+        # The session works, it is only rate limited; the flood wait keeps it out of the rotation meanwhile
+        account['ready'] = True
+        account['flood_until'] = time.monotonic() + e.value
+    except Exception as e:
+        account['ready'] = False
+        account['last_error'] = str(e)
+        print(f"User account {account['name']} health check failed: {e}")
+    return account['ready']
 
-3️⃣ Buyer should ONLY EVER release funds when they RECEIVE WHAT YOU PAID FOR.
+async def reconnect_user_account(account):
+    """Restart a user account's MTProto session after a failed health check"""
+    try:
+        if account['client'].is_connected:
+            await account['client'].stop()
+    except Exception as e:
+        print(f"Error stopping user account {account['name']}: {e}")
+    
+    if await check_user_account(account):
+        account['reconnects'] += 1
+        print(f"✅ User account {account['name']} reconnected")
 
-WE ARE NOT RESPONSIBLE FOR YOU RELEASING EARLY AND CAN NOT RETRIEVE FUNDS BACK
+async def user_account_supervisor(bot_app):
+    """Background task that pings idle user accounts and reconnects broken sessions"""
+    while True:
+        await asyncio.sleep(USER_ACCOUNT_KEEPALIVE_INTERVAL)
+        for account in user_accounts:
+            # Accounts busy creating groups are evidently alive, ones in a flood wait must not be pinged again
+            if account['active'] or account['flood_until'] > time.monotonic():
+                continue
+            if not await check_user_account(account):
+                await reconnect_user_account(account)
 
-4️⃣ Users should use trusted local wallets such as electrum.org or exodus wallet to prevent any issues with KYC wallets like Coinbase or Paxful.
+def format_readiness():
+    """Format startup readiness of the bot and user accounts for /opstats"""
+    ready_accounts = sum(1 for account in user_accounts if account['ready'])
+    bot_user = identity_cache['bot']
+    lines = ["<b>🩺 READINESS</b>"]
+    lines.append(f"Bot: {'ready as @' + bot_user.username if bot_user else 'not resolved'}")
+    lines.append(f"User accounts: {ready_accounts}/{len(user_accounts)} ready")
+    for account in user_accounts:
+        last_ping = account['last_ping'].strftime('%H:%M:%S') if account['last_ping'] else "never"
+        lines.append(f"{account['name']}: last ping {last_ping} | reconnects={account['reconnects']}")
+    return "\n".join(lines)
 
-ONLINE WALLETS CAN BE SLOW AND BLOCK ACCOUNTS
+def record_stage_timing(stage, seconds):
+    """Add one stage duration to its latency histogram"""
+    timing = stage_timings[stage]
+    timing['count'] += 1
+    timing['sum'] += seconds
+    timing['max'] = max(timing['max'], seconds)
+    for index, bound in enumerate(STAGE_HISTOGRAM_BUCKETS):
+        if seconds <= bound:
+            timing['buckets'][index] += 1
+            break
+    else:
+        timing['buckets'][-1] += 1
 
-5️⃣ Our fee's are taken from the balance in the wallet (1.0% for P2P and 1.0% for OTC), so make sure you take that into account when depositing funds.
+@contextmanager
+def timed_stage(stage):
+    """Time a provisioning stage, counting failures separately from the histogram"""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        stage_timings[stage]['errors'] += 1
+        raise
+    record_stage_timing(stage, time.perf_counter() - started)
 
-WE ARE A SERVICE BARE THAT IN MIND
+def stage_percentile(timing, fraction):
+    """Estimate a percentile from a stage histogram as the upper bound of its bucket"""
+    target = timing['count'] * fraction
+    seen = 0
+    for index, count in enumerate(timing['buckets']):
+        seen += count
+        if seen >= target and count:
+            if index < len(STAGE_HISTOGRAM_BUCKETS):
+                return STAGE_HISTOGRAM_BUCKETS[index]
+            return timing['max']
+    return timing['max']
 
-6️⃣ Make sure Coin and Netwwork are same for Buyer and Seller, else you may lose your funds."""
+def format_stage_timings():
+    """Format per-stage provisioning latency histograms for /opstats"""
+    lines = ["<b>⏱ GROUP PROVISIONING</b>"]
+    bucket_labels = [f"≤{bound}s" for bound in STAGE_HISTOGRAM_BUCKETS] + [f">{STAGE_HISTOGRAM_BUCKETS[-1]}s"]
+    for stage in PROVISION_STAGES:
+        timing = stage_timings[stage]
+        if not timing['count'] and not timing['errors']:
+            continue
+        avg = timing['sum'] / timing['count'] if timing['count'] else 0
+        lines.append(
+            f"<b>{stage}</b>: n={timing['count']} err={timing['errors']} avg={avg:.2f}s "
+            f"p50≤{stage_percentile(timing, 0.5)}s p95≤{stage_percentile(timing, 0.95)}s max={timing['max']:.2f}s"
+        )
+        histogram = " ".join(f"{label}:{count}" for label, count in zip(bucket_labels, timing['buckets']) if count)
+        if histogram:
+            lines.append(f"<code>{histogram}</code>")
+    if len(lines) == 1:
+        lines.append("No groups provisioned yet")
+    return "\n".join(lines)
+
+async def wait_until(check, timeout=None, wake_event=None):
+    """Poll check() with short exponential backoff until it returns a truthy value, bounded by timeout"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (timeout or PROVISION_STEP_TIMEOUT)
+    delay = PROVISION_POLL_MIN_DELAY
+    last_error = None
+    
+    while True:
+        try:
+            result = await check()
+            if result:
+                return result
+        except (FloodWait, ProvisionStepFailed):
+            # Rate limits are handled by the caller, unsafe failures are never retried
+            raise
+        except Exception as e:
+            last_error = e
         
-        keyboard = [[InlineKeyboardButton("⬅️ BACK", callback_data="back_to_start")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            if last_error:
+                raise asyncio.TimeoutError(f"Step not confirmed in time: {last_error}")
+            raise asyncio.TimeoutError("Step not confirmed in time")
         
-        await query.edit_message_text(terms_message, reply_markup=reply_markup)
-    
-    elif query.data == "invites":
-        user_id = query.from_user.id
-        referral_code = generate_referral_code(user_id)
-        
-        invites_message = f"""📍 Total Invites: 0 👤  
-📍 Tickets: 0 🎟  
+        # Sleep until the next poll, waking early if a Telegram update arrives
+        pause = min(delay, remaining)
+        if wake_event:
+            try:
+                await asyncio.wait_for(wake_event.wait(), pause)
+                wake_event.clear()
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.sleep(pause)
+        delay = min(delay * 2, PROVISION_POLL_MAX_DELAY)
 
-💡 Note: Each voucher equals 25.0% off on fees!  
+class ProvisionStepFailed(Exception):
+    """A provisioning call failed in a way that retrying could repeat its effect"""
 
-⚡️ For every new user you invite, you get 2 fee tickets.  
-⚡️ For every old user (who has already interacted with the bot), you get 1 fee tickets, you can invite them via your referral link too—for the first time ! Yes, you heard it right! We value your previous invites and reward you for them as well.  
+# Errors with which Telegram rejected a call outright, so repeating it cannot duplicate anything
+TELEGRAM_REJECTED_ERRORS = (RPCBadRequest, RPCForbidden)
 
-Send the link below to users and earn fee reduction tickets for free once they complete minimum $1 worth of Escrows.  
+async def retry_step(action, timeout=None, retry_on=Exception):
+    """Run a provisioning call, retrying with backoff until Telegram accepts it; other errors than retry_on fail the step"""
+    async def attempt():
+        try:
+            result = await action()
+        except FloodWait:
+            raise
+        except retry_on:
+            raise
+        except Exception as e:
+            raise ProvisionStepFailed(str(e)) from e
+        return result if result else True
+    return await wait_until(attempt, timeout)
 
-Your Invite Link: 
-https://t.me/PagaLEscrowBot?start={referral_code}
+async def add_bot_to_group(client, chat_id, bot_username):
+    """Add the bot to a group, treating an earlier attempt whose response was lost as success"""
+    try:
+        return await client.add_chat_members(chat_id, bot_username)
+    except UserAlreadyParticipant:
+        return True
 
-Start sharing and enjoy CRAZY fee discounts! 🎉"""
-        
-        keyboard = [[InlineKeyboardButton("⬅️ BACK", callback_data="back_to_start")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await query.edit_message_text(invites_message, reply_markup=reply_markup)
+async def prepare_escrow_group(bot, deal_type, account):
+    """Provision a fully prepared escrow supergroup for a deal type on a user account, timing each stage, and return its bot chat ID"""
+    client = account['client']
+    group_name = ESCROW_GROUP_TITLES[deal_type]
+    bot_user = await get_bot_identity(bot)
+    me = await get_user_identity(account)
     
-    elif query.data == "escrow_p2p":
-        await query.answer()
-        await query.edit_message_text("**Creating a safe trading place for you please wait, please wait...**", parse_mode='Markdown')
-        
-        if not user_client:
-            error_msg = "❌ Group creation is not configured. Please contact the bot administrator."
-            await query.edit_message_text(error_msg)
-            return
-        
-        try:
-            # Start user client if not started
-            if not user_client.is_connected:
-                await user_client.start()
-            
-            # Get user info
-            user = query.from_user
-            
-            # Generate random 8-digit number starting with 9 (will be added to title after /buyer or /seller)
-            random_number = random.randint(90000000, 99999999)
-            group_name = f"P2P Escrow By PAGAL Bot"
-            
-            # Create a supergroup (doesn't require initial members)
-            supergroup = await user_client.create_supergroup(
-                title=group_name,
-                description=""
-            )
-            
-            # Small delay to ensure group is fully created
-            await asyncio.sleep(2)
-            
-            # Add the bot to the group
-            bot_username = (await context.bot.get_me()).username
-            await user_client.add_chat_members(supergroup.id, bot_username)
+    try:
+        with timed_stage('total'):
+            # Create a supergroup (doesn't require initial members), never retried to avoid duplicates
+            with timed_stage('create'):
+                supergroup = await client.create_supergroup(
+                    title=group_name,
+                    description=""
+                )
             
-            # Store the group number as the transaction ID for this chat
             # Convert supergroup.id to the actual chat_id format used by bot
             # Pyrogram returns negative IDs, so we use abs() to get the positive part
             bot_chat_id = int(f"-100{abs(supergroup.id)}")
-            if bot_chat_id not in escrow_roles:
-                escrow_roles[bot_chat_id] = {}
-            escrow_roles[bot_chat_id]['transaction_id'] = random_number
             
-            # Small delay before promoting
-            await asyncio.sleep(1)
+            # Wake the admin check below as soon as the bot's membership update arrives
+            membership_event = asyncio.Event()
+            bot_membership_events[bot_chat_id] = membership_event
             
-            # Promote bot to admin with full permissions
-            await user_client.promote_chat_member(
-                chat_id=supergroup.id,
-                user_id=bot_username,
-                privileges=ChatPrivileges(
-                    can_manage_chat=True,
-                    can_delete_messages=True,
-                    can_manage_video_chats=True,
-                    can_restrict_members=True,
-                    can_promote_members=True,
-                    can_change_info=True,
-                    can_invite_users=True,
-                    can_pin_messages=True,
-                    is_anonymous=False
-                )
-            )
-            
-            # Promote user to anonymous admin temporarily to send message on behalf of group
-            me = await user_client.get_me()
-            await user_client.promote_chat_member(
-                chat_id=supergroup.id,
-                user_id=me.id,
-                privileges=ChatPrivileges(
-                    can_manage_chat=True,
-                    can_delete_messages=True,
-                    can_pin_messages=True,
-                    is_anonymous=True
-                )
-            )
+            try:
+                # Add the bot to the group as soon as the new group accepts members
+                with timed_stage('add_bot'):
+                    await retry_step(lambda: add_bot_to_group(client, supergroup.id, bot_user.username))
+                
+                # Promote bot to admin with full permissions
+                with timed_stage('promote_bot'):
+                    await retry_step(lambda: client.promote_chat_member(
+                        chat_id=supergroup.id,
+                        user_id=bot_user.username,
+                        privileges=ChatPrivileges(
+                            can_manage_chat=True,
+                            can_delete_messages=True,
+                            can_manage_video_chats=True,
+                            can_restrict_members=True,
+                            can_promote_members=True,
+                            can_change_info=True,
+                            can_invite_users=True,
+                            can_pin_messages=True,
+                            is_anonymous=False
+                        )
+                    ))
+                
+                # Promote user to anonymous admin temporarily to send message on behalf of group
+                with timed_stage('promote_self'):
+                    await retry_step(lambda: client.promote_chat_member(
+                        chat_id=supergroup.id,
+                        user_id=me.id,
+                        privileges=ChatPrivileges(
+                            can_manage_chat=True,
+                            can_delete_messages=True,
+                            can_pin_messages=True,
+                            is_anonymous=True
+                        )
+                    ))
+                
+                # Wait until the Bot API reports the bot as admin with invite rights
+                async def bot_is_admin():
+                    member = await bot.get_chat_member(chat_id=bot_chat_id, user_id=bot_user.id)
+                    return member.status == 'administrator' and getattr(member, 'can_invite_users', False)
+                
+                with timed_stage('confirm_admin'):
+                    await wait_until(bot_is_admin, wake_event=membership_event)
+            finally:
+                bot_membership_events.pop(bot_chat_id, None)
             
-            # Small delay for promotion to take effect
-            await asyncio.sleep(1)
+            with timed_stage('welcome_pin'):
+                # Send anonymous welcome message (appears from the group name); retried only while Telegram
+                # rejects it, since a send whose response was lost would post a second welcome
+                sent_message = await retry_step(lambda: client.send_message(
+                    chat_id=supergroup.id,
+                    text=f"<b>{GROUP_WELCOME_TEXT}</b>",
+                    parse_mode=enums.ParseMode.HTML
+                ), retry_on=TELEGRAM_REJECTED_ERRORS)
+                
+                # Pin the welcome message
+                pin_notice = await retry_step(lambda: client.pin_chat_message(
+                    chat_id=supergroup.id,
+                    message_id=sent_message.id,
+                    disable_notification=True
+                ))
             
-            # Wait for bot admin permissions to propagate
-            await asyncio.sleep(3)
+            # Service messages this pipeline caused: message IDs are sequential in a new group, so
+            # everything before the welcome (group created, bot added) plus the pin notice
+            pin_notice_id = getattr(pin_notice, 'id', sent_message.id + 1)
+            service_ids = list(range(1, sent_message.id)) + [pin_notice_id]
             
-            # Generate invite link from bot with retries (ensures bot-generated link, not Pyrogram account)
-            invite_chat_id = int(f"-100{abs(supergroup.id)}")
-            invite_link = None
-            max_retries = 3
+            # Delete them in one batched call while the user account can still do so
+            try:
+                with timed_stage('cleanup'):
+                    await client.delete_messages(supergroup.id, service_ids)
+            except Exception as e:
+                print(f"Error deleting service messages in {bot_chat_id}: {e}")
             
-            for attempt in range(max_retries):
+            # User account leaves the group, the bot removes the leave notice that follows the pin notice
+            with timed_stage('leave'):
+                await client.leave_chat(supergroup.id)
                 try:
-                    # Use bot's create_chat_invite_link method (bot-generated, not user account)
-                    chat_invite = await context.bot.create_chat_invite_link(
-                        chat_id=invite_chat_id,
-                        member_limit=2
-                    )
-                    invite_link = chat_invite.invite_link
-                    print(f"✅ Bot invite link created successfully on attempt {attempt + 1}")
-                    break
+                    await bot.delete_message(chat_id=bot_chat_id, message_id=pin_notice_id + 1)
                 except Exception as e:
-                    print(f"Attempt {attempt + 1} failed: {e}")
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(2)  # Wait before retry
-                    else:
-                        raise Exception(f"Failed to create bot invite link after {max_retries} attempts: {e}")
-            
-            # Send anonymous welcome message (appears from the group name)
-            welcome_text = """📍 Hey there traders! Welcome to our escrow service.
-✅ Please start with /dd command and fill the DealInfo Form"""
-            
-            sent_message = await user_client.send_message(
-                chat_id=supergroup.id,
-                text=f"<b>{welcome_text}</b>",
-                parse_mode=enums.ParseMode.HTML
-            )
-            
-            # Pin the welcome message
-            await user_client.pin_chat_message(
-                chat_id=supergroup.id,
-                message_id=sent_message.id,
-                disable_notification=True
-            )
-            
-            # User account leaves the group
-            await user_client.leave_chat(supergroup.id)
-            
-            # Small delay to ensure leave message is posted
-            await asyncio.sleep(1)
-            
-            # Delete service messages (join/leave notifications) using the bot
-            try:
-                # Get recent messages to find and delete service messages
-                async for message in user_client.get_chat_history(supergroup.id, limit=10):
-                    if message.service:
-                        await user_client.delete_messages(supergroup.id, message.id)
-            except:
-                pass
-            
-            # Get user's full name
-            user_full_name = user.first_name
-            if user.last_name:
-                user_full_name += f" {user.last_name}"
-            
-            # Use HTML formatting
-            success_message = f"""<b><u>Escrow Group Created</u></b>
+                    print(f"Error deleting leave notice in {bot_chat_id}: {e}")
+    except FloodWait:
+        raise
+    except Exception:
+        # Cached identities may be stale (e.g. bot username changed), resolve them again next time
+        forget_identities(account)
+        raise
+    
+    return bot_chat_id
 
-<b>Creator: {user_full_name}</b>
+async def create_escrow_invite_link(bot, chat_id):
+    """Create a 2-member invite link from the bot, retrying with backoff while admin rights propagate"""
+    # Use bot's create_chat_invite_link method (bot-generated, not user account)
+    with timed_stage('invite_link'):
+        chat_invite = await retry_step(lambda: bot.create_chat_invite_link(
+            chat_id=chat_id,
+            member_limit=2
+        ))
+    invite_link_stats['minted'] += 1
+    return chat_invite.invite_link
 
-<b>Join this escrow group and share the link with the buyer and seller.</b>
+async def mint_pooled_invite_link(bot, entry):
+    """Mint the 2-member invite link of a pooled group ahead of hand-out"""
+    try:
+        entry['invite_link'] = await create_escrow_invite_link(bot, entry['chat_id'])
+        entry['link_created_at'] = datetime.now()
+    except Exception as e:
+        print(f"Error pre-minting invite link for {entry['chat_id']}: {e}")
 
-<b>{invite_link}</b>
+async def add_to_group_pool(bot, deal_type, chat_id):
+    """Put a prepared group on standby with its invite link already minted"""
+    # Stored before minting, so a restart mid-mint still finds the group
+    pooled_groups[chat_id] = {'chat_id': chat_id, 'deal_type': deal_type, 'created_at': datetime.now()}
+    entry = pooled_groups[chat_id]
+    await mint_pooled_invite_link(bot, entry)
+    if chat_id in pooled_groups:
+        group_pool[deal_type].append(entry)
+    return entry
 
-<blockquote>⚠️ Note: This link is for 2 members only—third parties are not allowed to join.</blockquote>"""
-            
-            await query.edit_message_text(success_message, parse_mode='HTML')
-            
-        except FloodWait as e:
-            await query.edit_message_text(f"⏳ Rate limit hit. Please wait {e.value} seconds and try again.")
-        except Exception as e:
-            error_message = f"❌ Failed to create escrow group.\n\nPlease try again or contact support.\n\nError: {str(e)}"
-            await query.edit_message_text(error_message)
+def remove_from_group_pool(deal_type, entry):
+    """Take a group off standby, in memory and in the deal store"""
+    if entry in group_pool[deal_type]:
+        group_pool[deal_type].remove(entry)
+    pooled_groups.pop(entry['chat_id'], None)
+
+def restore_group_pool():
+    """Put the groups that were on standby at shutdown back in the pool, oldest first"""
+    for entry in sorted(pooled_groups.values(), key=lambda entry: entry['created_at']):
+        group_pool[entry['deal_type']].append(entry)
+    if pooled_groups:
+        print(f"🏊 Re-adopted {len(pooled_groups)} pooled group(s)")
+
+async def get_dispute_invite_link(bot, chat_id):
+    """Return the cached reusable admin invite link of a chat, creating it on first use"""
+    cached = dispute_invite_links.get(chat_id)
+    if cached:
+        invite_link_stats['dispute_cached'] += 1
+        return cached['invite_link']
     
-    elif query.data == "escrow_product":
-        await query.answer()
-        await query.edit_message_text("**Creating a safe trading place for you please wait, please wait...**", parse_mode='Markdown')
-        
-        if not user_client:
-            error_msg = "❌ Group creation is not configured. Please contact the bot administrator."
-            await query.edit_message_text(error_msg)
-            return
+    # Create invite link with no member limit (admins can join)
+    chat_invite = await bot.create_chat_invite_link(chat_id=chat_id)
+    dispute_invite_links[chat_id] = {'invite_link': chat_invite.invite_link, 'created_at': datetime.now()}
+    invite_link_stats['dispute_created'] += 1
+    return chat_invite.invite_link
+
+async def revoke_invite_link(bot, chat_id, invite_link):
+    """Revoke an invite link, reporting instead of raising on failure"""
+    try:
+        await bot.revoke_chat_invite_link(chat_id=chat_id, invite_link=invite_link)
+        invite_link_stats['revoked'] += 1
+    except Exception as e:
+        print(f"Error revoking invite link of {chat_id}: {e}")
+
+async def is_pooled_group_usable(bot, chat_id):
+    """Check that the bot is still an admin with invite rights in a pooled group; network errors count as usable"""
+    try:
+        member = await bot.get_chat_member(chat_id=chat_id, user_id=bot.id)
+    except (BadRequest, Forbidden) as e:
+        print(f"Pooled group {chat_id} is no longer reachable: {e}")
+        return False
+    except Exception as e:
+        print(f"Error checking pooled group {chat_id}: {e}")
+        return True
+    return member.status == 'administrator' and getattr(member, 'can_invite_users', False)
+
+async def invite_link_manager(bot_app):
+    """Background task that mints missing invite links and rotates old ones"""
+    bot = bot_app.bot
+    while True:
+        await asyncio.sleep(INVITE_LINK_REFRESH_INTERVAL)
+        now = datetime.now()
         
-        try:
-            # Start user client if not started
-            if not user_client.is_connected:
-                await user_client.start()
-            
-            # Get user info
-            user = query.from_user
-            
-            # Generate random 8-digit number starting with 9 (will be added to title after /buyer or /seller)
-            random_number = random.randint(90000000, 99999999)
-            group_name = f"OTC Escrow By PAGAL Bot"
-            
-            # Create a supergroup (doesn't require initial members)
-            supergroup = await user_client.create_supergroup(
-                title=group_name,
-                description=""
-            )
-            
-            # Small delay to ensure group is fully created
-            await asyncio.sleep(2)
-            
-            # Add the bot to the group
-            bot_username = (await context.bot.get_me()).username
-            await user_client.add_chat_members(supergroup.id, bot_username)
-            
-            # Store the group number as the transaction ID for this chat
-            # Convert supergroup.id to the actual chat_id format used by bot
-            # Pyrogram returns negative IDs, so we use abs() to get the positive part
-            bot_chat_id = int(f"-100{abs(supergroup.id)}")
-            if bot_chat_id not in escrow_roles:
-                escrow_roles[bot_chat_id] = {}
-            escrow_roles[bot_chat_id]['transaction_id'] = random_number
-            
-            # Small delay before promoting
-            await asyncio.sleep(1)
-            
-            # Promote bot to admin with full permissions
-            await user_client.promote_chat_member(
-                chat_id=supergroup.id,
-                user_id=bot_username,
-                privileges=ChatPrivileges(
-                    can_manage_chat=True,
-                    can_delete_messages=True,
-                    can_manage_video_chats=True,
-                    can_restrict_members=True,
-                    can_promote_members=True,
-                    can_change_info=True,
-                    can_invite_users=True,
-                    can_pin_messages=True,
-                    is_anonymous=False
-                )
-            )
-            
-            # Promote user to anonymous admin temporarily to send message on behalf of group
-            me = await user_client.get_me()
-            await user_client.promote_chat_member(
-                chat_id=supergroup.id,
-                user_id=me.id,
-                privileges=ChatPrivileges(
-                    can_manage_chat=True,
-                    can_delete_messages=True,
-                    can_pin_messages=True,
-                    is_anonymous=True
-                )
-            )
-            
-            # Small delay for promotion to take effect
-            await asyncio.sleep(1)
-            
-            # Wait for bot admin permissions to propagate
-            await asyncio.sleep(3)
-            
-            # Generate invite link from bot with retries (ensures bot-generated link, not Pyrogram account)
-            invite_chat_id = int(f"-100{abs(supergroup.id)}")
-            invite_link = None
-            max_retries = 3
-            
-            for attempt in range(max_retries):
+        # Pooled groups: drop the ones the bot lost, mint missing links, replace old ones
+        for deal_type, pool in group_pool.items():
+            for entry in list(pool):
+                # Handing out a pre-minted link makes no Telegram call, so a removed or demoted bot is caught here
+                if not await is_pooled_group_usable(bot, entry['chat_id']):
+                    if entry in pool:
+                        remove_from_group_pool(deal_type, entry)
+                        group_pool_stats['discarded'] += 1
+                        print(f"Discarding pooled {deal_type} group {entry['chat_id']}: bot is no longer an admin")
+                    continue
+                if not entry.get('invite_link'):
+                    await mint_pooled_invite_link(bot, entry)
+                    continue
+                if (now - entry['link_created_at']).total_seconds() < INVITE_LINK_MAX_AGE:
+                    continue
+                
                 try:
-                    # Use bot's create_chat_invite_link method (bot-generated, not user account)
-                    chat_invite = await context.bot.create_chat_invite_link(
-                        chat_id=invite_chat_id,
-                        member_limit=2
-                    )
-                    invite_link = chat_invite.invite_link
-                    print(f"✅ Bot invite link created successfully on attempt {attempt + 1}")
-                    break
+                    fresh_link = await create_escrow_invite_link(bot, entry['chat_id'])
                 except Exception as e:
-                    print(f"Attempt {attempt + 1} failed: {e}")
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(2)  # Wait before retry
-                    else:
-                        raise Exception(f"Failed to create bot invite link after {max_retries} attempts: {e}")
-            
-            # Send anonymous welcome message (appears from the group name)
-            welcome_text = """📍 Hey there traders! Welcome to our escrow service.
-✅ Please start with /dd command and fill the DealInfo Form"""
-            
-            sent_message = await user_client.send_message(
-                chat_id=supergroup.id,
-                text=f"<b>{welcome_text}</b>",
-                parse_mode=enums.ParseMode.HTML
-            )
-            
-            # Pin the welcome message
-            await user_client.pin_chat_message(
-                chat_id=supergroup.id,
-                message_id=sent_message.id,
-                disable_notification=True
-            )
-            
-            # User account leaves the group
-            await user_client.leave_chat(supergroup.id)
-            
-            # Small delay to ensure leave message is posted
+                    print(f"Error refreshing invite link for {entry['chat_id']}: {e}")
+                    continue
+                
+                # The group may have been handed out with its old link while minting
+                if entry not in pool:
+                    await revoke_invite_link(bot, entry['chat_id'], fresh_link)
+                    continue
+                old_link = entry['invite_link']
+                entry['invite_link'] = fresh_link
+                entry['link_created_at'] = datetime.now()
+                await revoke_invite_link(bot, entry['chat_id'], old_link)
+        
+        # Dispute links: rotate after DISPUTE_LINK_MAX_AGE
+        for chat_id, cached in list(dispute_invite_links.items()):
+            if (now - cached['created_at']).total_seconds() < DISPUTE_LINK_MAX_AGE:
+                continue
+            dispute_invite_links.pop(chat_id, None)
+            await revoke_invite_link(bot, chat_id, cached['invite_link'])
+            try:
+                await get_dispute_invite_link(bot, chat_id)
+            except Exception as e:
+                print(f"Error refreshing dispute link for {chat_id}: {e}")
+
+def format_invite_link_stats():
+    """Format invite link counters for /opstats"""
+    ready = sum(1 for pool in group_pool.values() for entry in pool if entry.get('invite_link'))
+    pooled = sum(len(pool) for pool in group_pool.values())
+    lines = ["<b>🔗 INVITE LINKS</b>"]
+    lines.append(f"Pre-minted: {ready}/{pooled} pooled groups")
+    lines.append(
+        f"Served ready: {invite_link_stats['served_ready']} | Served fresh: {invite_link_stats['served_fresh']}"
+    )
+    lines.append(
+        f"Dispute cached: {invite_link_stats['dispute_cached']} | Dispute created: {invite_link_stats['dispute_created']} | "
+        f"Minted: {invite_link_stats['minted']} | Revoked: {invite_link_stats['revoked']}"
+    )
+    return "\n".join(lines)
+
+async def acquire_escrow_group(bot, deal_type, on_position=None):
+    """Hand out a pooled escrow group (or queue a creation on a pool miss) and return (chat_id, invite_link)"""
+    pool = group_pool[deal_type]
+    
+    # Serve from the pool first, skipping groups that are no longer usable
+    while pool:
+        pooled = pool[0]
+        remove_from_group_pool(deal_type, pooled)
+        if pooled.get('invite_link'):
+            group_pool_stats['hits'] += 1
+            invite_link_stats['served_ready'] += 1
+            return pooled['chat_id'], pooled['invite_link']
+        try:
+            invite_link = await create_escrow_invite_link(bot, pooled['chat_id'])
+            group_pool_stats['hits'] += 1
+            invite_link_stats['served_fresh'] += 1
+            return pooled['chat_id'], invite_link
+        except Exception as e:
+            group_pool_stats['discarded'] += 1
+            print(f"Discarding pooled {deal_type} group {pooled['chat_id']}: {e}")
+    
+    # Pool is empty, queue a group creation on the next free account
+    group_pool_stats['misses'] += 1
+    bot_chat_id = await queue_group_creation(bot, deal_type, on_position)
+    invite_link = await create_escrow_invite_link(bot, bot_chat_id)
+    invite_link_stats['served_fresh'] += 1
+    return bot_chat_id, invite_link
+
+async def group_pool_refill(bot_app):
+    """Background worker that keeps GROUP_POOL_SIZE prepared groups on standby per deal type"""
+    while True:
+        # Users waiting in the creation queue get the accounts first
+        if group_creation_jobs:
             await asyncio.sleep(1)
-            
-            # Delete service messages (join/leave notifications) using the bot
+            continue
+        
+        # Refill the emptiest pool that is not already fully covered by in-flight creations
+        wanted = [
+            deal_type for deal_type, pool in group_pool.items()
+            if len(pool) + group_pool_pending[deal_type] < GROUP_POOL_SIZE
+        ]
+        if not wanted:
+            # Pool is full, check again shortly
+            await asyncio.sleep(5)
+            continue
+        
+        deal_type = min(wanted, key=lambda name: len(group_pool[name]) + group_pool_pending[name])
+        pool = group_pool[deal_type]
+        group_pool_pending[deal_type] += 1
+        try:
+            chat_id = await run_with_user_account(lambda account: prepare_escrow_group(bot_app.bot, deal_type, account))
+            await add_to_group_pool(bot_app.bot, deal_type, chat_id)
+            group_pool_stats['created'] += 1
+            print(f"✅ Pooled {deal_type} group {chat_id} ({len(pool)}/{GROUP_POOL_SIZE})")
+        except NoUserAccountAvailable as e:
+            print(f"Group pool refill waiting {e.value} seconds for a user account")
+            await asyncio.sleep(e.value)
+        except FloodWait:
+            # The scheduler already skips this account until its flood wait expires
+            pass
+        except Exception as e:
+            group_pool_stats['failed'] += 1
+            print(f"Error refilling group pool: {e}")
+        finally:
+            group_pool_pending[deal_type] -= 1
+        
+        # Pace group creation to the configured refill rate
+        await asyncio.sleep(GROUP_POOL_REFILL_INTERVAL)
+
+async def deal_holds_funds(chat_id, deal):
+    """Check whether any escrow address of a deal holds funds, asking the chain when the monitor may have missed them"""
+    addresses = {}
+    for address in monitored_addresses.find_keys('chat_id', chat_id):
+        info = monitored_addresses[address]
+        if info.total_balance > 0:
+            return True
+        addresses[address] = info.network
+    
+    # Deposits after an address went cold, or with no explorer key, are never credited by the monitor
+    if not deal.get('last_deposit_time'):
+        return False
+    # The deal's own address, in case its watch record is gone
+    network = str(deal.get('selected_network') or '')
+    if network in ESCROW_XPUBS and deal.get('transaction_id') is not None:
+        addresses.setdefault(get_deal_deposit_address(network, deal['transaction_id']), network)
+    for address, network in addresses.items():
+        try:
+            if await get_live_balance(address, network) > 0:
+                return True
+        except Exception as e:
+            # Unknown is treated as funded, expiring would stop watching the address and reset the group
+            print(f"Error checking {network} balance of {address} before expiring chat {chat_id}: {e}")
+            return True
+    return False
+
+async def refresh_deal_state(chat_id, deal, now):
+    """Move a deal to the lifecycle state its activity calls for and return that state"""
+    state = deal.get('status') or DealState.OPEN
+    if state in SETTLED_DEAL_STATES:
+        return state
+    
+    last_activity = deal.get('last_activity')
+    idle_for = (now - last_activity).total_seconds() if last_activity else 0
+    if idle_for >= GROUP_RECYCLE_IDLE_TTL:
+        # Never expire a deal whose escrow address still holds a deposit
+        new_state = DealState.FUNDED if await deal_holds_funds(chat_id, deal) else DealState.EXPIRED
+    elif idle_for >= DEAL_IDLE_TTL:
+        new_state = DealState.IDLE
+    else:
+        new_state = DealState.OPEN
+    
+    if deal.get('status') != new_state:
+        deal.status = new_state
+    return new_state
+
+async def recycle_escrow_group(bot, chat_id, deal):
+    """Reset a finished escrow group to a fresh state and return its deal type"""
+    chat = await bot.get_chat(chat_id)
+    deal_type = deal['group_type']
+    
+    # Members the bot never saw cannot be removed, so the group is not safe to reuse; check before removing anyone
+    members = set(deal.get('members', ()))
+    for role in ('buyer', 'seller'):
+        if deal.get(role):
+            members.add(deal[role]['user_id'])
+    member_count = await bot.get_chat_member_count(chat_id=chat_id)
+    if member_count - 1 > len(members):
+        raise Exception(f"{member_count - 1 - len(members)} unknown member(s) in group")
+    
+    # Stop new joins through the old invite links
+    if deal.get('invite_link'):
+        await revoke_invite_link(bot, chat_id, deal['invite_link'])
+    dispute_link = dispute_invite_links.pop(chat_id, None)
+    if dispute_link:
+        await revoke_invite_link(bot, chat_id, dispute_link['invite_link'])
+    
+    # Remove every member the bot has seen in the group
+    for user_id in members:
+        try:
+            await bot.ban_chat_member(chat_id=chat_id, user_id=user_id)
+            await bot.unban_chat_member(chat_id=chat_id, user_id=user_id, only_if_banned=True)
+        except Exception as e:
+            print(f"Error removing {user_id} from {chat_id}: {e}")
+    
+    # Anyone the removal missed (e.g. another admin) leaves the group unsafe to reuse
+    member_count = await bot.get_chat_member_count(chat_id=chat_id)
+    if member_count > 1:
+        raise Exception(f"{member_count - 1} unknown member(s) still in group")
+    
+    # Purge history: message IDs are sequential, so delete everything up to a fresh marker message
+    marker = await bot.send_message(chat_id=chat_id, text="♻️")
+    message_ids = list(range(1, marker.message_id + 1))
+    for start in range(0, len(message_ids), 100):
+        await bot.delete_messages(chat_id=chat_id, message_ids=message_ids[start:start + 100])
+    
+    # Reset title and the photo set by generate_group_photo
+    if chat.title != ESCROW_GROUP_TITLES[deal_type]:
+        await bot.set_chat_title(chat_id=chat_id, title=ESCROW_GROUP_TITLES[deal_type])
+    if chat.photo:
+        await bot.delete_chat_photo(chat_id=chat_id)
+    
+    # Post and pin a fresh welcome message
+    await bot.unpin_all_chat_messages(chat_id=chat_id)
+    welcome = await bot.send_message(chat_id=chat_id, text=f"<b>{GROUP_WELCOME_TEXT}</b>", parse_mode='HTML')
+    await bot.pin_chat_message(chat_id=chat_id, message_id=welcome.message_id, disable_notification=True)
+    
+    return deal_type
+
+def archive_deal(chat_id, deal, state, now):
+    """Write a finished or expired deal and the addresses it used to the archive"""
+    transaction_id = deal.get('transaction_id')
+    key = str(transaction_id) if transaction_id is not None else f"{chat_id}@{now.isoformat()}"
+    addresses = {}
+    for address in monitored_addresses.find_keys('chat_id', chat_id):
+        info = monitored_addresses[address]
+        if info.transaction_id in (None, transaction_id):
+            addresses[address] = info.to_dict()
+    deal_archive[key] = {
+        'chat_id': chat_id, 'state': str(state), 'archived_at': now, 'deal': deal.to_dict(), 'addresses': addresses
+    }
+
+def forget_address_caches(address, info):
+    """Drop the cached balance and derived address of an address no longer watched"""
+    balance_cache.pop(address, None)
+    derived_deposit_addresses.pop((str(info.network), info.transaction_id), None)
+
+async def retire_deal(bot_app, chat_id, deal, state, now):
+    """Archive a finished or expired deal, stop watching its addresses and return its group to the pool"""
+    archive_deal(chat_id, deal, state, now)
+    
+    # Forget the old deal before touching the group so no handler acts on it mid-reset
+    escrow_roles.pop(chat_id, None)
+    idle_deals.pop(chat_id, None)
+    for address in monitored_addresses.find_keys('chat_id', chat_id):
+        info = monitored_addresses.pop(address, None)
+        if info is not None:
+            forget_address_caches(address, info)
+    deal_lifecycle_stats['archived'] += 1
+    
+    # Only groups the pool handed out are reset; /buyer also opens deals in chats the bot merely sits in
+    if not deal.get('group_type'):
+        dispute_invite_links.pop(chat_id, None)
+        print(f"Archived {state} deal in chat {chat_id}, not an escrow group so it is left as is")
+        return
+    try:
+        deal_type = await recycle_escrow_group(bot_app.bot, chat_id, deal)
+        await add_to_group_pool(bot_app.bot, deal_type, chat_id)
+        group_pool_stats['recycled'] += 1
+        print(f"♻️ Archived {state} deal and recycled {deal_type} group {chat_id} into the pool")
+    except Exception as e:
+        group_pool_stats['recycle_failed'] += 1
+        print(f"Error recycling group {chat_id}: {e}")
+    finally:
+        # A recycle that failed before revoking it leaves the link in Telegram, but not in memory
+        dispute_invite_links.pop(chat_id, None)
+
+def stop_closed_watches(now):
+    """Stop watching addresses whose deposit window has closed and drop the stopped ones from memory"""
+    grace = timedelta(seconds=MONITOR_COLD_GRACE)
+    for address, info in list(dict.items(monitored_addresses)):
+        # Polled addresses go cold on their last check, chain-wide watchers have no such check
+        if not info.cold and is_scan_watched(info) and info.window_ends and now > info.window_ends + grace:
+            info.cold = True
+            print(f"Deposit window closed, stopped watching {info.network} address {address}")
+        if info.cold and monitored_addresses.evict(address):
+            forget_address_caches(address, info)
+            deal_lifecycle_stats['addresses_evicted'] += 1
+
+async def sweep_deals(bot_app):
+    """Run one lifecycle pass over resident and idle deals, then trim memory to what active deals need"""
+    now = datetime.now()
+    retiring = []
+    for chat_id, deal in list(dict.items(escrow_roles)):
+        state = await refresh_deal_state(chat_id, deal, now)
+        if state in FINISHED_DEAL_STATES:
+            retiring.append((chat_id, deal, state))
+        elif state == DealState.IDLE:
+            # Written before leaving memory; the next update in the group reads the deal back
+            if escrow_roles.evict(chat_id):
+                idle_deals[chat_id] = deal.last_activity
+                deal_lifecycle_stats['idle_evicted'] += 1
+    
+    # Idle deals out of memory expire without being loaded, unless their group came back to life
+    for chat_id, last_activity in list(idle_deals.items()):
+        if dict.__contains__(escrow_roles, chat_id):
+            del idle_deals[chat_id]
+            continue
+        if (now - last_activity).total_seconds() < GROUP_RECYCLE_IDLE_TTL:
+            continue
+        deal = escrow_roles.get(chat_id)
+        if deal is None:
+            del idle_deals[chat_id]
+            continue
+        state = await refresh_deal_state(chat_id, deal, now)
+        if state in FINISHED_DEAL_STATES:
+            retiring.append((chat_id, deal, state))
+    
+    for chat_id, deal, state in retiring:
+        await retire_deal(bot_app, chat_id, deal, state, now)
+    
+    stop_closed_watches(now)
+    
+    # Lookup and archive rows are read through on demand, keep only the ones with changes in flight
+    for table in (transaction_chats, deal_archive):
+        for key in list(dict.keys(table)):
+            table.evict(key)
+    for table in deal_store_tables:
+        table.forget_missing()
+    deal_lifecycle_stats['sweeps'] += 1
+
+async def deal_lifecycle_manager(bot_app):
+    """Background task that moves deals through their lifecycle every DEAL_LIFECYCLE_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(DEAL_LIFECYCLE_INTERVAL)
+        try:
+            await sweep_deals(bot_app)
+        except Exception as e:
+            print(f"Error in deal lifecycle sweep: {e}")
+
+def format_lifecycle_stats():
+    """Format deal lifecycle counts for /opstats"""
+    states = Counter(str(deal.get('status') or DealState.OPEN) for deal in dict.values(escrow_roles))
+    resident = " | ".join(f"{state.value.capitalize()}: {states.get(state.value, 0)}" for state in DealState)
+    return "\n".join([
+        "<b>🔄 DEAL LIFECYCLE</b>",
+        f"In memory: {len(escrow_roles)} deals, {len(monitored_addresses)} watched addresses",
+        resident,
+        f"Idle out of memory: {len(idle_deals)} | Archived: {deal_lifecycle_stats['archived']} | "
+        f"Evicted: {deal_lifecycle_stats['idle_evicted']} idle deals, {deal_lifecycle_stats['addresses_evicted']} closed addresses"
+    ])
+
+def format_group_pool_stats():
+    """Format group pool depth and hit/miss counters for /opstats"""
+    hits = group_pool_stats['hits']
+    misses = group_pool_stats['misses']
+    total = hits + misses
+    hit_rate = (hits / total * 100) if total else 0
+    
+    lines = ["<b>🏊 GROUP POOL</b>"]
+    for deal_type, pool in group_pool.items():
+        lines.append(f"{deal_type.upper()}: {len(pool)}/{GROUP_POOL_SIZE}")
+    lines.append(f"Refill interval: {GROUP_POOL_REFILL_INTERVAL:.0f}s x {len(user_accounts)} account(s)")
+    lines.append(f"Hits: {hits} | Misses: {misses} | Hit rate: {hit_rate:.1f}%")
+    lines.append(
+        f"Created: {group_pool_stats['created']} | Failed: {group_pool_stats['failed']} | "
+        f"Discarded: {group_pool_stats['discarded']}"
+    )
+    lines.append(f"Recycled: {group_pool_stats['recycled']} | Recycle failed: {group_pool_stats['recycle_failed']}")
+    return "\n".join(lines)
+
+async def handle_escrow_group_request(query, context, deal_type):
+    """Hand an escrow group of the given deal type to the user who pressed the button"""
+    await query.edit_message_text("**Creating a safe trading place for you please wait, please wait...**", parse_mode='Markdown')
+    
+    if not user_accounts:
+        error_msg = "❌ Group creation is not configured. Please contact the bot administrator."
+        await query.edit_message_text(error_msg)
+        return
+    
+    try:
+        # Get user info
+        user = query.from_user
+        
+        # Keep the user informed of their place in the creation queue on a pool miss
+        async def show_queue_position(position):
             try:
-                # Get recent messages to find and delete service messages
-                async for message in user_client.get_chat_history(supergroup.id, limit=10):
-                    if message.service:
-                        await user_client.delete_messages(supergroup.id, message.id)
-            except:
-                pass
-            
-            # Get user's full name
-            user_full_name = user.first_name
-            if user.last_name:
-                user_full_name += f" {user.last_name}"
-            
-            # Use HTML formatting
-            success_message = f"""<b><u>Escrow Group Created</u></b>
+                await query.edit_message_text(
+                    f"⏳ <b>Many escrows are being created right now.</b>\n\n<b>Your position in the queue: #{position}</b>",
+                    parse_mode='HTML'
+                )
+            except Exception as e:
+                print(f"Error updating queue position: {e}")
+        
+        bot_chat_id, invite_link = await acquire_escrow_group(context.bot, deal_type, show_queue_position)
+        
+        # Issue a unique 8-digit number starting with 9 (will be added to title after /buyer or /seller)
+        # Store the group number as the transaction ID for this chat, it also picks the deal's deposit address
+        if bot_chat_id not in escrow_roles:
+            escrow_roles[bot_chat_id] = {}
+        escrow_roles[bot_chat_id]['transaction_id'] = new_transaction_id(bot_chat_id)
+        escrow_roles[bot_chat_id]['invite_link'] = invite_link
+        escrow_roles[bot_chat_id]['group_type'] = deal_type
+        escrow_roles[bot_chat_id]['last_activity'] = datetime.now()
+        
+        # Get user's full name
+        user_full_name = user.first_name
+        if user.last_name:
+            user_full_name += f" {user.last_name}"
+        
+        # Use HTML formatting
+        success_message = f"""<b><u>Escrow Group Created</u></b>
 
 <b>Creator: {user_full_name}</b>
 
@@ -687,14 +1952,173 @@ Start sharing and enjoy CRAZY fee discounts! 🎉"""
 <b>{invite_link}</b>
 
 <blockquote>⚠️ Note: This link is for 2 members only—third parties are not allowed to join.</blockquote>"""
-            
-            await query.edit_message_text(success_message, parse_mode='HTML')
-            
-        except FloodWait as e:
-            await query.edit_message_text(f"⏳ Rate limit hit. Please wait {e.value} seconds and try again.")
-        except Exception as e:
-            error_message = f"❌ Failed to create escrow group.\n\nPlease try again or contact support.\n\nError: {str(e)}"
-            await query.edit_message_text(error_message)
+        
+        await query.edit_message_text(success_message, parse_mode='HTML')
+        
+    except GroupQueueFull:
+        await query.edit_message_text("⚠️ Too many escrow groups are being created right now. Please try again in a few minutes.")
+    except GroupCreationUnavailable as e:
+        await query.edit_message_text(f"⚠️ {e}. Please try again later.")
+    except (FloodWait, NoUserAccountAvailable) as e:
+        await query.edit_message_text(f"⏳ Rate limit hit. Please wait {e.value} seconds and try again.")
+    except Exception as e:
+        error_message = f"❌ Failed to create escrow group.\n\nPlease try again or contact support.\n\nError: {str(e)}"
+        await query.edit_message_text(error_message)
+
+async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle button callbacks"""
+    query = update.callback_query
+    await query.answer()
+    
+    if query.data == "commands_list":
+        commands_message = """📌 AVAILABLE COMMANDS
+
+Here you have a full command list, incase you do like to move through the bot using commands instead of the buttons.
+
+/start - A command to start interacting with the bot
+/whatisescrow - A command to tell you more about escrow
+/instructions - A command with text instructions
+/terms - A command to bring out our TOS
+/dispute - A command to contact the admins
+/menu - A command to bring out a menu for the bot
+/contact - A command to get admin's contact
+/commands - A command to get commands list
+/stats - A command to check user stats
+/vouch - A command to vouch for the bot
+/newdeal - A command to start a new deal
+/tradeid - A command to get trade id for a chat
+/dd - A command to add deal details
+/escrow - A command to get a escrow group link
+/token - A command to select token for the escrow
+/deposit - A command to generate deposit address
+/verify - A command to verify wallet address.
+/dispute - A command to raise a dispute request
+/balance - A command to check the balance of the escrow address
+/release - A command to release the funds in the escrow
+/refund - A command to refund the funds in the escrow
+/seller - A command to set the seller
+/buyer - A command to set the buyer
+/setfee - A command to set custom trade fee
+/save - A command to save default addresses for various chains.
+/saved - A command to check saved addresses
+/referral - A command to check your referrals"""
+        
+        keyboard = [[InlineKeyboardButton("BACK", callback_data="back_to_start")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        await query.edit_message_text(commands_message, reply_markup=reply_markup)
+    
+    elif query.data == "contact":
+        contact_message = """☎️ CONTACT ARBITRATOR
+
+💬 Type /dispute
+
+💡 Incase you're not getting a response can reach out to @bsr_official"""
+        
+        keyboard = [[InlineKeyboardButton("⬅️ BACK", callback_data="back_to_start")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        await query.edit_message_text(contact_message, reply_markup=reply_markup)
+    
+    elif query.data == "what_is_escrow":
+        await query.answer("**Coming Soon...**", show_alert=True)
+    
+    elif query.data == "instructions":
+        instructions_message = """📘 GUIDE " HOW TO USE @PagaLEscrowBot ( Escrow Bot ) " FOR SAFE AND FASTEST HASSLE-FREE ESCROW 🚀  
+
+Step 1 : Use /escrow command in the DM of the Bot.  
+( It will auto-create a safe escrow group and drop the link so that buyer and seller can join via that link. ) 🔗👥  
+
+Step 2 : Use /dd command to initiate the process of escrow where you will get the format to express your deal and info.  
+( It will include quantity, rate, TnC's agreed upon by both parties. ) 📝🤝  
+
+Step 3 : Use /buyer ( your address ) if you are a buyer 🛒 or /seller ( your address ) if you are a seller 🏪 to verify address and continue the deal.  
+( Provide your crypto address which will be used in case of release or refund. ) 💳🔐  
+
+Step 4 : Choose the token and network by /token command and then either party has to accept it. ✅💱  
+
+Step 5 : Use /deposit command to deposit the asset within the bot.  
+( Note : Bot will give the deposit address and it has a time limit to deposit ⏳, you have to deposit within that given time. ) ⏰💸  
+
+Step 6 : Once verified by the bot, you can continue the deal.  
+( Bot will send the real-time deposit details in the chat. ) 📊💬  
+
+Step 7 : After a successful deal, you can release the asset to the party by using /release ( amount / all ).  
+( Thus, the bot will itself release the asset to the party and send the verification in the chat. ) 🎉💼  
+
+🚨 IN CASE OF ANY DISPUTE OR ISSUE, YOU CAN FEEL FREE TO USE /dispute COMMAND, AND SUPPORT WILL JOIN YOU SHORTLY. 🛎️👩‍💻"""
+        
+        keyboard = [[InlineKeyboardButton("⬅️ BACK", callback_data="back_to_start")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        await query.edit_message_text(instructions_message, reply_markup=reply_markup)
+    
+    elif query.data == "terms":
+        terms_message = """📜 TERMS
+
+Our terms of usage are simple.
+
+🎟 Fees
+1.0% for P2P and 1.0% for OTC Flat.
+
+Transactions fee will be applicable.
+
+TAKE THIS INTO ACCOUNT WHEN DEPOSITING FUNDS
+
+1️⃣ Record/screenshot the desktop while your perform any testing of logins or data, or recording of physcial items being opened, this is to provide evidence that the data does not work, if the data is working and you are happy to release the funds, you can delete the recording.
+
+FAILURE TO PRODUCE SUFFICIENT EVIDENCE OF TESTING WILL RESULT IN LOSS OF FUNDS
+
+2️⃣ Before you purchase any information, please take the time to learn what you are buying
+
+IT IS NOT THE RESPONSIBILITY OF THE SELLER TO EXPLAIN HOW TO USE THE INFORMATION, ALTHOUGH IT MAY HELP MAKE TRANSACTIONS RUN SMOOTHER IF VENDORS HELP BUYERS
+
+3️⃣ Buyer should ONLY EVER release funds when they RECEIVE WHAT YOU PAID FOR.
+
+WE ARE NOT RESPONSIBLE FOR YOU RELEASING EARLY AND CAN NOT RETRIEVE FUNDS BACK
+
+4️⃣ Users should use trusted local wallets such as electrum.org or exodus wallet to prevent any issues with KYC wallets like Coinbase or Paxful.
+
+ONLINE WALLETS CAN BE SLOW AND BLOCK ACCOUNTS
+
+5️⃣ Our fee's are taken from the balance in the wallet (1.0% for P2P and 1.0% for OTC), so make sure you take that into account when depositing funds.
+
+WE ARE A SERVICE BARE THAT IN MIND
+
+6️⃣ Make sure Coin and Netwwork are same for Buyer and Seller, else you may lose your funds."""
+        
+        keyboard = [[InlineKeyboardButton("⬅️ BACK", callback_data="back_to_start")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        await query.edit_message_text(terms_message, reply_markup=reply_markup)
+    
+    elif query.data == "invites":
+        user_id = query.from_user.id
+        referral_code = generate_referral_code(user_id)
+        
+        invites_message = f"""📍 Total Invites: 0 👤  
+📍 Tickets: 0 🎟  
+
+💡 Note: Each voucher equals 25.0% off on fees!  
+
+⚡️ For every new user you invite, you get 2 fee tickets.  
+⚡️ For every old user (who has already interacted with the bot), you get 1 fee tickets, you can invite them via your referral link too—for the first time ! Yes, you heard it right! We value your previous invites and reward you for them as well.  
+
+Send the link below to users and earn fee reduction tickets for free once they complete minimum $1 worth of Escrows.  
+
+Your Invite Link: 
+https://t.me/PagaLEscrowBot?start={referral_code}
+
+Start sharing and enjoy CRAZY fee discounts! 🎉"""
+        
+        keyboard = [[InlineKeyboardButton("⬅️ BACK", callback_data="back_to_start")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        await query.edit_message_text(invites_message, reply_markup=reply_markup)
+    
+    elif query.data in ESCROW_CALLBACK_DEAL_TYPES:
+        await query.answer()
+        await handle_escrow_group_request(query, context, ESCROW_CALLBACK_DEAL_TYPES[query.data])
     
     elif query.data.startswith("token_"):
         # Handle token selection
@@ -857,7 +2281,7 @@ Start sharing and enjoy CRAZY fee discounts! 🎉"""
         transaction_id = escrow_roles[chat_id].get('transaction_id')
         if not transaction_id:
             # Generate transaction ID (8-digit number starting with 9)
-            transaction_id = random.randint(90000000, 99999999)
+            transaction_id = new_transaction_id(chat_id)
             escrow_roles[chat_id]['transaction_id'] = transaction_id
         
         # Get current timestamp + 1 minute for trade start time
@@ -971,14 +2395,11 @@ Start sharing and enjoy CRAZY fee discounts! 🎉"""
             await query.answer("Error: Missing transaction information!", show_alert=True)
             return
         
-        # Determine escrow address and network label based on network
+        # Determine this deal's escrow address and network label based on network
         if token == "USDT":
-            if network == "BSC":
-                escrow_address = "0xDA4c2a5B876b0c7521e1c752690D8705080000fE"
-                network_label = "BSC"
-            elif network == "TRON":
-                escrow_address = "TVsTYwseYdRXUKk2ehcEcTT4UU3b2tqrVm"
-                network_label = "TRON"
+            if network in ("BSC", "TRON"):
+                escrow_address = get_deal_deposit_address(network, transaction_id)
+                network_label = network
             else:
                 await query.answer("⚠️ Unsupported network!", show_alert=True)
                 return
@@ -986,10 +2407,12 @@ Start sharing and enjoy CRAZY fee discounts! 🎉"""
             await query.answer("⚠️ Unsupported token!", show_alert=True)
             return
         
-        # Get current balance from monitored addresses
-        current_balance = 0
-        if escrow_address in monitored_addresses:
-            current_balance = monitored_addresses[escrow_address]['total_balance']
+        # A payer pressing Check Payment expects a deposit, poll the address fast again
+        if monitored_addresses.get(escrow_address, {}).get('transaction_id') == transaction_id:
+            boost_address_polling(escrow_address)
+        
+        # Get a fresh on-chain balance (cached for a few seconds across button presses)
+        current_balance, stale_since = await get_escrow_balance(escrow_address, network)
         
         # Calculate time elapsed since deposit request
         last_deposit_time = escrow_roles[chat_id].get('last_deposit_time')
@@ -1021,7 +2444,7 @@ Start sharing and enjoy CRAZY fee discounts! 🎉"""
 
 {payment_instruction}
 
-<b>Amount Recieved: {current_balance:.5f} [{current_balance:.2f}$]</b>
+<b>Amount Recieved: {current_balance:.5f} [{current_balance:.2f}$]</b>{format_stale_balance_note(stale_since)}
 
 ⏰ <b>Trade Start Time: {trade_start_time}</b>
 ⏰ <b>Address Reset In: {remaining_time:.2f} Min</b>
@@ -1395,7 +2818,7 @@ async def deposit_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Get transaction ID if exists, or generate new one
     transaction_id = escrow_roles[chat_id].get('transaction_id')
     if not transaction_id:
-        transaction_id = random.randint(90000000, 99999999)
+        transaction_id = new_transaction_id(chat_id)
         escrow_roles[chat_id]['transaction_id'] = transaction_id
     
     # Get trade start time if exists, or use current time + 1 minute
@@ -1404,14 +2827,11 @@ async def deposit_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         trade_start_time = (datetime.now() + timedelta(minutes=1)).strftime("%d/%m/%y %H:%M:%S")
         escrow_roles[chat_id]['trade_start_time'] = trade_start_time
     
-    # Determine escrow address and network label based on network
+    # Determine this deal's escrow address and network label based on network
     if token == "USDT":
-        if network == "BSC":
-            escrow_address = "0xDA4c2a5B876b0c7521e1c752690D8705080000fE"
-            network_label = "BSC"
-        elif network == "TRON":
-            escrow_address = "TVsTYwseYdRXUKk2ehcEcTT4UU3b2tqrVm"
-            network_label = "TRON"
+        if network in ("BSC", "TRON"):
+            escrow_address = get_deal_deposit_address(network, transaction_id)
+            network_label = network
         else:
             await update.message.reply_text("⚠️ Unsupported network for deposit.")
             return
@@ -1469,15 +2889,29 @@ async def deposit_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Store the current time as last deposit time
     escrow_roles[chat_id]['last_deposit_time'] = datetime.now()
     
-    # Start monitoring this address for deposits
-    monitored_addresses[escrow_address] = {
-        'chat_id': chat_id,
-        'network': network,
-        'token': token,
-        'network_label': network_label,
-        'total_balance': 0,
-        'last_check': datetime.now()
-    }
+    # A shared fallback address still watched for another deal is taken over, its deposits could be misattributed
+    previous = monitored_addresses.get(escrow_address)
+    if previous and previous['chat_id'] != chat_id:
+        print(f"⚠️ {network} address {escrow_address} is shared with transaction {previous['transaction_id']}, configure {network}_ESCROW_XPUB")
+    
+    # Start monitoring this address for deposits, polling fast while the deposit window is open
+    window_ends = escrow_roles[chat_id]['last_deposit_time'] + timedelta(minutes=DEPOSIT_WINDOW_MINUTES)
+    if previous and previous['chat_id'] == chat_id and previous['transaction_id'] == transaction_id:
+        # Same deal again: keep its running total and cursors so earlier deposits are not announced twice
+        previous.window_ends = window_ends
+    else:
+        monitored_addresses[escrow_address] = {
+            'chat_id': chat_id,
+            'transaction_id': transaction_id,
+            'network': network,
+            'token': token,
+            'network_label': network_label,
+            'total_balance': 0,
+            'last_check': datetime.now(),
+            'window_ends': window_ends
+        }
+    # Reopens a cold address and resets its poll interval to the fast one
+    boost_address_polling(escrow_address)
     
     print(f"Started monitoring {network} address {escrow_address} for chat {chat_id}")
 
@@ -1502,12 +2936,16 @@ async def balance_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    # Determine escrow address based on network
+    # The deposit address is derived from the deal's transaction ID
+    transaction_id = escrow_roles[chat_id].get('transaction_id')
+    if not transaction_id:
+        await update.message.reply_text("⚠️ No deposit address yet. Please use /deposit first.")
+        return
+    
+    # Determine this deal's escrow address based on network
     if token == "USDT":
-        if network == "BSC":
-            escrow_address = "0xDA4c2a5B876b0c7521e1c752690D8705080000fE"
-        elif network == "TRON":
-            escrow_address = "TVsTYwseYdRXUKk2ehcEcTT4UU3b2tqrVm"
+        if network in ("BSC", "TRON"):
+            escrow_address = get_deal_deposit_address(network, transaction_id)
         else:
             await update.message.reply_text("⚠️ Unsupported network.")
             return
@@ -1515,19 +2953,268 @@ async def balance_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("⚠️ Balance check is currently only supported for USDT.")
         return
     
-    # Get current balance from monitored addresses
-    current_balance = 0
-    if escrow_address in monitored_addresses:
-        current_balance = monitored_addresses[escrow_address]['total_balance']
-    
-    # Format message: everything bold except amount (monospace) and USD value (bold+underline)
-    balance_message = f"<b>Current Escrow Balance is: <code>{current_balance:.5f}</code>usdt <u>{current_balance:.2f}$</u></b>"
+    # Get a fresh on-chain balance (cached for a few seconds across requests)
+    current_balance, stale_since = await get_escrow_balance(escrow_address, network)
+    
+    # Format message: everything bold except amount (monospace) and USD value (bold+underline)
+    balance_message = f"<b>Current Escrow Balance is: <code>{current_balance:.5f}</code>usdt <u>{current_balance:.2f}$</u></b>"
+    balance_message += format_stale_balance_note(stale_since)
+    
+    await update.message.reply_text(balance_message, parse_mode='HTML')
+
+def get_http_session():
+    """Return the shared keep-alive HTTP session, creating it on first use"""
+    global http_session
+    if http_session is None or http_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+        )
+        http_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+        )
+    return http_session
+
+async def close_http_session():
+    """Close the shared HTTP session and its pooled connections"""
+    global http_session
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
+    http_session = None
+
+def new_token_bucket(rate):
+    """Create a full token bucket refilling at rate tokens per second"""
+    capacity = max(1.0, rate)
+    return {'rate': rate, 'capacity': capacity, 'tokens': capacity, 'updated': time.monotonic()}
+
+def refill_token_bucket(bucket):
+    """Add the tokens earned since the bucket was last updated"""
+    now = time.monotonic()
+    bucket['tokens'] = min(bucket['capacity'], bucket['tokens'] + (now - bucket['updated']) * bucket['rate'])
+    bucket['updated'] = now
+
+async def take_token(bucket):
+    """Wait until the bucket holds a token, then take it"""
+    while True:
+        refill_token_bucket(bucket)
+        if bucket['tokens'] >= 1:
+            bucket['tokens'] -= 1
+            return
+        await asyncio.sleep((1 - bucket['tokens']) / bucket['rate'])
+
+def register_api_keys(provider, keys, rate_per_key, rate_limit):
+    """Build the key pool and provider-wide bucket for an explorer"""
+    api_provider_buckets[provider] = new_token_bucket(rate_limit)
+    api_key_pools[provider] = [
+        {
+            'key': key,
+            'bucket': new_token_bucket(rate_per_key),
+            'cooldown_until': 0,
+            'calls': 0,
+            'rate_limited': 0,
+            'errors': 0
+        }
+        for key in keys
+    ]
+
+register_api_keys("bscscan", BSCSCAN_API_KEYS, BSCSCAN_RATE_PER_KEY, BSCSCAN_RATE_LIMIT)
+register_api_keys("trongrid", TRONGRID_API_KEYS or [""], TRONGRID_RATE_PER_KEY, TRONGRID_RATE_LIMIT)
+
+class ProviderRateLimited(Exception):
+    """Raised when every attempt at an explorer call was answered with a rate-limit response"""
+    def __init__(self, provider):
+        self.provider = provider
+        super().__init__(f"{provider} rate limit reached on every key tried")
+
+async def acquire_api_key(provider):
+    """Take a provider token and a token from the fullest key that is not cooling down"""
+    await take_token(api_provider_buckets[provider])
+    pool = api_key_pools[provider]
+    while True:
+        now = time.monotonic()
+        ready = [record for record in pool if record['cooldown_until'] <= now]
+        if ready:
+            for record in ready:
+                refill_token_bucket(record['bucket'])
+            # Taking from the fullest bucket spreads calls round-robin across the pool
+            record = max(ready, key=lambda record: record['bucket']['tokens'])
+            if record['bucket']['tokens'] >= 1:
+                record['bucket']['tokens'] -= 1
+                record['calls'] += 1
+                return record
+            delay = (1 - record['bucket']['tokens']) / record['bucket']['rate']
+        else:
+            delay = min(record['cooldown_until'] for record in pool) - now
+        await asyncio.sleep(delay)
+
+def is_rate_limited(provider, status, data):
+    """Tell whether an explorer response means the key hit its rate limit"""
+    if status == 429:
+        return True
+    if not isinstance(data, dict):
+        return False
+    if provider == "bscscan":
+        # BscScan answers 200 with status "0" and "Max rate limit reached"
+        return data.get('status') == '0' and 'rate limit' in str(data.get('result', '')).lower()
+    # TronGrid answers 403 with "The key exceeds the frequency limit"
+    return 'frequency limit' in str(data.get('Error', '')).lower()
+
+async def provider_request(provider, url, params=None):
+    """GET an explorer endpoint through the provider's circuit breaker, rate limiter and key pool, returning the JSON body"""
+    return await call_with_breaker(provider, lambda: send_provider_request(provider, url, params))
+
+async def send_provider_request(provider, url, params):
+    """GET an explorer endpoint with the next available key, moving to another key on rate-limit responses"""
+    for _ in range(API_KEY_MAX_ATTEMPTS):
+        record = await acquire_api_key(provider)
+        request_params = dict(params or {})
+        headers = {}
+        if provider == "bscscan":
+            request_params['apikey'] = record['key']
+        elif record['key']:
+            headers['TRON-PRO-API-KEY'] = record['key']
+        
+        try:
+            async with get_http_session().get(url, params=request_params, headers=headers) as response:
+                status = response.status
+                if status >= 500:
+                    raise Exception(f"{provider} returned HTTP {status}")
+                data = None if status == 429 else await response.json(content_type=None)
+        except Exception:
+            record['errors'] += 1
+            raise
+        
+        if not is_rate_limited(provider, status, data):
+            return data
+        
+        # Rest this key and retry on another one
+        record['rate_limited'] += 1
+        record['cooldown_until'] = time.monotonic() + API_KEY_COOLDOWN
+        print(f"{provider} key {mask_api_key(record['key'])} rate limited, cooling down for {API_KEY_COOLDOWN:.0f}s")
+    raise ProviderRateLimited(provider)
+
+class ProviderUnavailable(Exception):
+    """Raised instead of calling an explorer whose circuit is open"""
+    def __init__(self, provider, retry_after):
+        self.provider = provider
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"{provider} circuit open, retry in {self.retry_after} seconds")
+
+def circuit_retry_after(provider):
+    """Seconds until an open circuit lets a probe through, 0 when requests may be sent"""
+    breaker = circuit_breakers[provider]
+    if breaker['state'] == 'closed':
+        return 0
+    return max(0, breaker['retry_at'] - time.monotonic())
+
+def enter_circuit(provider):
+    """Let a request through the provider's circuit, turning the first one after the open delay into the probe"""
+    breaker = circuit_breakers[provider]
+    if breaker['state'] == 'closed':
+        return
+    now = time.monotonic()
+    if breaker['state'] == 'open' and now >= breaker['retry_at']:
+        breaker['state'] = 'half_open'
+        return
+    
+    # Open, or half-open with the probe still in flight
+    breaker['short_circuited'] += 1
+    raise ProviderUnavailable(provider, max(BREAKER_BASE_DELAY, breaker['retry_at'] - now))
+
+def record_provider_success(provider):
+    """Close the provider's circuit after a request it answered"""
+    breaker = circuit_breakers[provider]
+    if breaker['state'] != 'closed':
+        print(f"✅ {provider} circuit closed")
+    breaker.update(state='closed', failures=0, opens=0)
+
+def record_provider_failure(provider):
+    """Count a failed request, opening the circuit on a failed probe or too many failures in a row"""
+    breaker = circuit_breakers[provider]
+    breaker['failures'] += 1
+    if breaker['state'] != 'half_open' and breaker['failures'] < BREAKER_FAILURE_THRESHOLD:
+        return
     
-    await update.message.reply_text(balance_message, parse_mode='HTML')
+    # Exponential backoff with jitter so callers do not all probe at the same moment
+    delay = min(BREAKER_MAX_DELAY, BREAKER_BASE_DELAY * 2 ** breaker['opens'])
+    delay = delay / 2 + random.uniform(0, delay / 2)
+    breaker.update(state='open', opens=breaker['opens'] + 1, retry_at=time.monotonic() + delay)
+    breaker['trips'] += 1
+    print(f"⚠️ {provider} circuit open for {delay:.0f}s after {breaker['failures']} failures")
+
+async def call_with_breaker(provider, request):
+    """Run an explorer request through the provider's circuit breaker"""
+    enter_circuit(provider)
+    try:
+        result = await request()
+    except ProviderRateLimited:
+        # The provider answered, it is only throttling our keys
+        record_provider_success(provider)
+        raise
+    except asyncio.CancelledError:
+        # A cancelled probe proves nothing, let the next request probe instead
+        breaker = circuit_breakers[provider]
+        if breaker['state'] == 'half_open':
+            breaker.update(state='open', retry_at=time.monotonic())
+        raise
+    except Exception:
+        record_provider_failure(provider)
+        raise
+    record_provider_success(provider)
+    return result
+
+def mask_api_key(key):
+    """Shorten an API key for logs and /opstats"""
+    if not key:
+        return "anonymous"
+    return f"{key[:4]}…{key[-4:]}" if len(key) > 8 else "****"
+
+def format_api_key_stats():
+    """Format explorer key pool usage for /opstats"""
+    lines = ["<b>🔑 EXPLORER API KEYS</b>"]
+    now = time.monotonic()
+    for provider, pool in api_key_pools.items():
+        if not pool:
+            lines.append(f"{provider}: no keys configured")
+            continue
+        for record in pool:
+            line = (
+                f"{provider} {mask_api_key(record['key'])}: Calls: {record['calls']} | "
+                f"Rate limited: {record['rate_limited']} | Errors: {record['errors']}"
+            )
+            if record['cooldown_until'] > now:
+                line += f" | Cooling down: {record['cooldown_until'] - now:.0f}s"
+            lines.append(line)
+    return "\n".join(lines)
+
+def format_circuit_stats():
+    """Format explorer circuit breaker states for /opstats"""
+    lines = ["<b>🛡 EXPLORER CIRCUITS</b>"]
+    for provider, breaker in circuit_breakers.items():
+        line = (
+            f"{provider}: {breaker['state']} | Failures: {breaker['failures']} | "
+            f"Trips: {breaker['trips']} | Short-circuited: {breaker['short_circuited']}"
+        )
+        retry_after = circuit_retry_after(provider)
+        if breaker['state'] == 'open' and retry_after > 0:
+            line += f" | Probe in: {retry_after:.0f}s"
+        lines.append(line)
+    return "\n".join(lines)
+
+def new_bsc_cursor():
+    """Create an empty BSC scan cursor: last block scanned and transfer keys already counted in it"""
+    return {'last_block': 0, 'seen': set()}
+
+def bsc_transfer_key(tx):
+    """Identify a token transfer, including its log index when the explorer reports one"""
+    return f"{tx['hash']}:{tx.get('logIndex', '')}"
 
-async def check_bsc_transactions(address):
-    """Check BSC USDT transactions for an address"""
-    if not BSCSCAN_API_KEY:
+async def check_bsc_transactions(address, cursor):
+    """Check BSC USDT transactions for an address, returning only those newer than its cursor"""
+    if not BSCSCAN_API_KEYS:
         return []
     
     url = f"https://api.bscscan.com/api"
@@ -1536,91 +3223,179 @@ async def check_bsc_transactions(address):
         'action': 'tokentx',
         'contractaddress': BSC_USDT_CONTRACT,
         'address': address,
-        'startblock': 0,
+        # Re-read the last scanned block, it may have been only partly indexed last time
+        'startblock': cursor['last_block'],
         'endblock': 999999999,
-        'sort': 'desc',
-        'apikey': BSCSCAN_API_KEY
+        'sort': 'asc'
     }
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                data = await response.json()
-                if data.get('status') == '1' and data.get('result'):
-                    # Filter incoming transactions only (to this address)
-                    incoming = [tx for tx in data['result'] if tx['to'].lower() == address.lower()]
-                    return incoming
-                return []
+        data = await provider_request("bscscan", url, params)
+        if data.get('status') == '1' and data.get('result'):
+            # Filter incoming transactions only (to this address) that were not counted yet
+            incoming = [
+                tx for tx in data['result']
+                if tx['to'].lower() == address.lower() and bsc_transfer_key(tx) not in cursor['seen']
+            ]
+            
+            # Advance the cursor, only transfers in the newest block need remembering
+            last_block = max(int(tx['blockNumber']) for tx in data['result'])
+            if last_block > cursor['last_block']:
+                cursor['last_block'] = last_block
+                cursor['seen'] = set()
+            cursor['seen'].update(
+                bsc_transfer_key(tx) for tx in data['result'] if int(tx['blockNumber']) == last_block
+            )
+            return incoming
+        return []
+    except ProviderUnavailable:
+        raise
     except Exception as e:
         print(f"Error checking BSC transactions: {e}")
         return []
 
-async def check_tron_transactions(address):
-    """Check TRON USDT (TRC20) transactions for an address"""
-    if not TRONGRID_API_KEY:
-        return []
+def new_tron_cursor():
+    """Create an empty TRON scan cursor: timestamp watermark and transaction IDs already counted at it"""
+    return {'min_timestamp': 0, 'seen': set()}
+
+async def check_tron_transactions(address, cursor):
+    """Check TRON USDT (TRC20) transactions for an address past its watermark, returning them with the advanced watermark"""
+    if not TRONGRID_API_KEYS:
+        return [], cursor
     
-    url = f"https://api.trongrid.io/v1/accounts/{address}/transactions/trc20"
+    url = f"{TRONGRID_BASE_URL}/v1/accounts/{address}/transactions/trc20"
     params = {
-        'limit': 100,
-        'contract_address': TRON_USDT_CONTRACT
-    }
-    headers = {
-        'TRON-PRO-API-KEY': TRONGRID_API_KEY
+        'limit': TRON_PAGE_SIZE,
+        'contract_address': TRON_USDT_CONTRACT,
+        'only_to': 'true',
+        # Re-read the watermark timestamp, more transfers may share it
+        'min_timestamp': cursor['min_timestamp'],
+        'order_by': 'block_timestamp,asc'
     }
     
+    # Advance a copy: the caller stores it only together with crediting the transfers, so a cancelled
+    # check leaves the old watermark and the next poll reads the same pages again
+    cursor = {'min_timestamp': cursor['min_timestamp'], 'seen': set(cursor['seen'])}
+    incoming = []
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params, headers=headers) as response:
-                data = await response.json()
-                if data.get('success') and data.get('data'):
-                    # Filter incoming transactions only (to this address)
-                    incoming = [tx for tx in data['data'] if tx['to'] == address]
-                    return incoming
-                return []
+        for _ in range(TRON_MAX_PAGES):
+            data = await provider_request("trongrid", url, params)
+            if not data.get('success') or not data.get('data'):
+                break
+            
+            for tx in data['data']:
+                # Filter incoming transactions only (to this address) that were not counted yet
+                if tx['to'] != address or tx['transaction_id'] in cursor['seen']:
+                    continue
+                incoming.append(tx)
+                
+                # Advance the watermark, only transfers at the newest timestamp need remembering
+                if tx['block_timestamp'] > cursor['min_timestamp']:
+                    cursor['min_timestamp'] = tx['block_timestamp']
+                    cursor['seen'] = set()
+                cursor['seen'].add(tx['transaction_id'])
+            
+            # Follow the next page only while there is more new data
+            fingerprint = data.get('meta', {}).get('fingerprint')
+            if not fingerprint:
+                break
+            params['fingerprint'] = fingerprint
+    except ProviderUnavailable:
+        # Nothing read yet, let the monitor wait for the circuit instead
+        if not incoming:
+            raise
     except Exception as e:
         print(f"Error checking TRON transactions: {e}")
-        return []
+    
+    # Transfers from pages read before an error are already past the returned watermark, so return them
+    return incoming, cursor
 
-async def monitor_deposits(bot_app):
-    """Background task to monitor escrow addresses for deposits"""
-    while True:
-        try:
-            for address, info in list(monitored_addresses.items()):
-                chat_id = info['chat_id']
-                network = info['network']
-                network_label = info['network_label']
-                token = info['token']
-                current_balance = info['total_balance']
-                
-                # Check transactions based on network
-                transactions = []
-                if network == "BSC":
-                    transactions = await check_bsc_transactions(address)
-                    # BSC USDT has 18 decimals
-                    decimals = 18
-                    token_name = "BSC-USD"
-                elif network == "TRON":
-                    transactions = await check_tron_transactions(address)
-                    # TRON USDT has 6 decimals
-                    decimals = 6
-                    token_name = "TRON-USDT"
-                
-                # Calculate total received
-                total_received = 0
-                for tx in transactions:
-                    if network == "BSC":
-                        total_received += int(tx['value']) / (10 ** decimals)
-                    elif network == "TRON":
-                        total_received += int(tx['value']) / (10 ** decimals)
-                
-                # If new deposit detected
-                if total_received > current_balance:
-                    new_amount = total_received - current_balance
-                    monitored_addresses[address]['total_balance'] = total_received
-                    
-                    # Send deposit confirmation message
-                    confirmation_message = f"""<b>Deposit 💵 has been confirmed
+async def fetch_bsc_token_balance(address):
+    """Read the USDT balance of a BSC address with a single balanceOf call"""
+    call = {
+        'to': BSC_USDT_CONTRACT,
+        # balanceOf(address) selector followed by the 32-byte padded address
+        'data': ERC20_BALANCE_OF_SELECTOR + address[2:].lower().rjust(64, '0')
+    }
+    async with provider_semaphores["BSC"]:
+        result = await bsc_rpc_call('eth_call', [call, 'latest'])
+    return int(result, 16) / (10 ** USDT_DECIMALS["BSC"])
+
+async def fetch_tron_token_balance(address):
+    """Read the USDT balance of a TRON address with a single account lookup"""
+    url = f"{TRONGRID_BASE_URL}/v1/accounts/{address}"
+    async with provider_semaphores["TRON"]:
+        data = await provider_request("trongrid", url)
+    
+    # Unactivated accounts have no data and hold nothing
+    for account in data.get('data', []):
+        for token_balance in account.get('trc20', []):
+            if TRON_USDT_CONTRACT in token_balance:
+                return int(token_balance[TRON_USDT_CONTRACT]) / (10 ** USDT_DECIMALS["TRON"])
+    return 0
+
+async def get_live_balance(address, network):
+    """Return the on-chain USDT balance of an address, cached briefly and shared by simultaneous callers"""
+    cached = balance_cache.get(address)
+    if cached and time.monotonic() - cached['fetched_at'] < BALANCE_CACHE_TTL:
+        return cached['balance']
+    
+    # Join a lookup that is already in flight instead of starting another one
+    pending = balance_lookups.get(address)
+    if pending is None:
+        fetch = fetch_bsc_token_balance if network == "BSC" else fetch_tron_token_balance
+        pending = asyncio.ensure_future(fetch(address))
+        balance_lookups[address] = pending
+        pending.add_done_callback(lambda _: balance_lookups.pop(address, None))
+    
+    balance = await asyncio.shield(pending)
+    balance_cache[address] = {'balance': balance, 'fetched_at': time.monotonic()}
+    return balance
+
+async def get_escrow_balance(address, network):
+    """Return the escrow balance and None, or the last known balance and when it was known if the lookup fails"""
+    info = monitored_addresses.get(address)
+    known_balance = info.total_balance if info else 0
+    
+    try:
+        balance = await get_live_balance(address, network)
+    except Exception as e:
+        # An open circuit is expected during an outage, only log real failures
+        if not isinstance(e, ProviderUnavailable):
+            print(f"Error fetching live {network} balance for {address}: {e}")
+        
+        # Serve the last live lookup, or the monitor's running total if there was none
+        cached = balance_cache.get(address)
+        if cached:
+            return cached['balance'], datetime.now() - timedelta(seconds=time.monotonic() - cached['fetched_at'])
+        return known_balance, info.last_check if info else datetime.now()
+    
+    # Funds arrived that the monitor has not confirmed yet, check this address right away
+    if info and balance > known_balance:
+        boost_address_polling(address)
+    return balance, None
+
+def format_stale_balance_note(stale_since):
+    """Warn that a balance is the last known one, or return an empty string for a fresh balance"""
+    if stale_since is None:
+        return ""
+    return f"\n⚠️ <b>Explorer unavailable, showing the last known balance from {stale_since.strftime('%H:%M:%S')}</b>"
+
+async def credit_deposit(bot_app, info, new_amount):
+    """Add a newly received amount to a watched address and announce it in its escrow group"""
+    chat_id = info.chat_id
+    network = info.network
+    token_name = USDT_TOKEN_NAMES[network]
+    total_received = info.total_balance + new_amount
+    info.total_balance = total_received
+    
+    # A funded deal stays in memory and never expires until it is released or refunded
+    deal = escrow_roles.get(chat_id)
+    if deal is not None and deal.get('status') not in SETTLED_DEAL_STATES:
+        deal.status = DealState.FUNDED
+    
+    # Send deposit confirmation message
+    confirmation_message = f"""<b>Deposit 💵 has been confirmed
 
 🪙 Token: {token_name}
 💰 Amount: {new_amount:.5f}[{new_amount:.2f}$]
@@ -1631,22 +3406,516 @@ Now you can proceed with the Deal✅
 Useful commands:
 🗒 <code>/release</code> = Will Release The Funds To Buyer.
 🗒 <code>/refund</code> = Will Refund The Funds To Seller.</b>"""
-                    
-                    try:
-                        await bot_app.bot.send_message(
-                            chat_id=chat_id,
-                            text=confirmation_message,
-                            parse_mode='HTML'
-                        )
-                        print(f"✅ Deposit detected: {new_amount} USDT on {network} for chat {chat_id}")
-                    except Exception as e:
-                        print(f"Failed to send deposit notification: {e}")
+    
+    try:
+        await bot_app.bot.send_message(
+            chat_id=chat_id,
+            text=confirmation_message,
+            parse_mode='HTML'
+        )
+        print(f"✅ Deposit detected: {new_amount} USDT on {network} for chat {chat_id}")
+    except Exception as e:
+        print(f"Failed to send deposit notification: {e}")
+
+async def check_address_deposits(bot_app, address, info):
+    """Check one watched address for new deposits, announce them in its escrow group and return the amount received"""
+    network = info.network
+    
+    # Check transactions based on network, bounded per explorer
+    transactions = []
+    tron_cursor = None
+    async with provider_semaphores[network]:
+        if network == "BSC":
+            # Only transfers past the address's block cursor come back
+            cursor = info.setdefault('bsc_cursor', new_bsc_cursor())
+            transactions = await check_bsc_transactions(address, cursor)
+        elif network == "TRON":
+            # Only transfers past the address's timestamp watermark come back, with the watermark past them
+            cursor = info.get('tron_cursor') or new_tron_cursor()
+            transactions, tron_cursor = await check_tron_transactions(address, cursor)
+    
+    # The address may have been handed to another deal while we were waiting on the explorer
+    if monitored_addresses.get(address) is not info:
+        return 0
+    
+    # Add new transfers to the running total, moving the watermark past them in the same step
+    if tron_cursor is not None:
+        info.tron_cursor = tron_cursor
+    received = sum(int(tx['value']) for tx in transactions) / (10 ** USDT_DECIMALS[network])
+    if received > 0:
+        await credit_deposit(bot_app, info, received)
+    return received
+
+async def bsc_rpc_call(method, params):
+    """Call a JSON-RPC method on the configured BSC node"""
+    payload = {'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}
+    
+    async def send():
+        async with get_http_session().post(BSC_RPC_URL, json=payload) as response:
+            if response.status >= 500:
+                raise Exception(f"BSC node returned HTTP {response.status}")
+            return await response.json(content_type=None)
+    
+    data = await call_with_breaker("bsc_rpc", send)
+    if data.get('error'):
+        raise Exception(f"{method} failed: {data['error']}")
+    return data['result']
+
+async def scan_bsc_transfer_logs(bot_app):
+    """Scan new blocks for USDT transfers to any watched BSC address with one eth_getLogs call per block range"""
+    async with provider_semaphores["BSC"]:
+        head = int(await bsc_rpc_call('eth_blockNumber', []), 16) - BSC_LOG_CONFIRMATIONS
+    
+    # Start from the current head the first time, deposits are only expected after /deposit
+    if bsc_log_cursor['last_block'] is None:
+        bsc_log_cursor['last_block'] = head
+        return
+    
+    while bsc_log_cursor['last_block'] < head:
+        from_block = bsc_log_cursor['last_block'] + 1
+        to_block = min(head, from_block + BSC_LOG_BLOCK_RANGE - 1)
+        
+        # Index of every watched BSC address, keyed by its 32-byte topic form
+        watched = {
+            '0x' + address[2:].lower().rjust(64, '0'): address
+            for address, info in monitored_addresses.items() if info.network == "BSC" and is_address_polled(info)
+        }
+        
+        if watched:
+            log_filter = {
+                'fromBlock': hex(from_block),
+                'toBlock': hex(to_block),
+                'address': BSC_USDT_CONTRACT,
+                # Transfer(from, to, value) with the recipient restricted to watched addresses
+                'topics': [ERC20_TRANSFER_TOPIC, None, list(watched)]
+            }
+            async with provider_semaphores["BSC"]:
+                logs = await bsc_rpc_call('eth_getLogs', [log_filter])
+            
+            received = {}
+            for log in logs:
+                address = watched.get(log['topics'][2].lower())
+                if address:
+                    received[address] = received.get(address, 0) + int(log['data'], 16)
+            
+            for address, value in received.items():
+                info = monitored_addresses.get(address)
+                if info:
+                    bsc_log_stats['matched'] += 1
+                    await credit_deposit(bot_app, info, value / (10 ** USDT_DECIMALS["BSC"]))
+        
+        bsc_log_cursor['last_block'] = to_block
+        bsc_log_stats['ranges'] += 1
+
+async def bsc_log_watcher(bot_app):
+    """Background task that covers every watched BSC address with a single log scan per interval"""
+    while True:
+        delay = BSC_LOG_SCAN_INTERVAL
+        try:
+            await scan_bsc_transfer_logs(bot_app)
+        except ProviderUnavailable as e:
+            # Wait out the open circuit instead of retrying every interval
+            delay = max(delay, e.retry_after)
+        except Exception as e:
+            bsc_log_stats['errors'] += 1
+            print(f"Error scanning BSC transfer logs: {e}")
+        await asyncio.sleep(delay)
+
+def base58check_encode(payload):
+    """Encode bytes as Base58Check (payload followed by a 4-byte double-SHA256 checksum)"""
+    data = payload + hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4]
+    number = int.from_bytes(data, 'big')
+    encoded = ""
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = BASE58_ALPHABET[remainder] + encoded
+    # Leading zero bytes are written as leading '1's
+    padding = len(data) - len(data.lstrip(b'\0'))
+    return BASE58_ALPHABET[0] * padding + encoded
+
+def tron_address_from_event(value):
+    """Convert an event address (0x-hex or 41-hex) to the base58 form used in monitored_addresses"""
+    if value.startswith('T'):
+        return value
+    hex_address = value[2:] if value.startswith('0x') else value
+    if len(hex_address) == 40:
+        hex_address = '41' + hex_address
+    return base58check_encode(bytes.fromhex(hex_address))
+
+def base58check_decode(text):
+    """Decode a Base58Check string, verifying its 4-byte checksum"""
+    number = 0
+    for char in text:
+        number = number * 58 + BASE58_ALPHABET.index(char)
+    data = number.to_bytes((number.bit_length() + 7) // 8, 'big')
+    # Leading '1's stand for leading zero bytes
+    data = b'\0' * (len(text) - len(text.lstrip(BASE58_ALPHABET[0]))) + data
+    payload, checksum = data[:-4], data[-4:]
+    if hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4] != checksum:
+        raise ValueError("Bad Base58Check checksum")
+    return payload
+
+def keccak_round_constants():
+    """Generate the 24 Keccak-f[1600] round constants from their LFSR definition"""
+    constants = []
+    state = 1
+    for _ in range(24):
+        constant = 0
+        for bit in range(7):
+            if state & 1:
+                constant |= 1 << ((1 << bit) - 1)
+            state = ((state << 1) ^ 0x71) & 0xFF if state & 0x80 else state << 1
+        constants.append(constant)
+    return constants
+
+def keccak_rotation_offsets():
+    """Generate the Keccak rho rotation offset of each lane"""
+    offsets = [0] * 25
+    x, y = 1, 0
+    for t in range(24):
+        offsets[x + 5 * y] = ((t + 1) * (t + 2) // 2) % 64
+        x, y = y, (2 * x + 3 * y) % 5
+    return offsets
+
+KECCAK_ROUND_CONSTANTS = keccak_round_constants()
+KECCAK_ROTATION_OFFSETS = keccak_rotation_offsets()
+KECCAK_LANE_MASK = (1 << 64) - 1
+
+def keccak_f1600(lanes):
+    """Apply the Keccak-f[1600] permutation to 25 64-bit lanes"""
+    def rotate(value, shift):
+        return ((value << shift) | (value >> (64 - shift))) & KECCAK_LANE_MASK if shift else value
+    
+    for round_constant in KECCAK_ROUND_CONSTANTS:
+        # Theta: mix each column's parity into its neighbours
+        parity = [lanes[x] ^ lanes[x + 5] ^ lanes[x + 10] ^ lanes[x + 15] ^ lanes[x + 20] for x in range(5)]
+        lanes = [lanes[i] ^ parity[(i - 1) % 5] ^ rotate(parity[(i + 1) % 5], 1) for i in range(25)]
+        
+        # Rho and pi: rotate each lane and move it to its new position
+        moved = [0] * 25
+        for x in range(5):
+            for y in range(5):
+                moved[y + 5 * ((2 * x + 3 * y) % 5)] = rotate(lanes[x + 5 * y], KECCAK_ROTATION_OFFSETS[x + 5 * y])
+        
+        # Chi and iota
+        lanes = [
+            moved[i] ^ (~moved[(i + 1) % 5 + i - i % 5] & moved[(i + 2) % 5 + i - i % 5] & KECCAK_LANE_MASK)
+            for i in range(25)
+        ]
+        lanes[0] ^= round_constant
+    return lanes
+
+def keccak256(data):
+    """Hash bytes with Keccak-256 (the pre-standard SHA-3 used by Ethereum and TRON addresses)"""
+    rate = 136
+    padded = bytearray(data) + b'\x01' + b'\0' * ((-len(data) - 1) % rate)
+    padded[-1] |= 0x80
+    
+    lanes = [0] * 25
+    for offset in range(0, len(padded), rate):
+        block = padded[offset:offset + rate]
+        for i in range(rate // 8):
+            lanes[i] ^= int.from_bytes(block[i * 8:i * 8 + 8], 'little')
+        lanes = keccak_f1600(lanes)
+    return b''.join(lane.to_bytes(8, 'little') for lane in lanes[:4])
+
+def secp256k1_add(p1, p2):
+    """Add two secp256k1 points in affine coordinates, None being the point at infinity"""
+    if p1 is None:
+        return p2
+    if p2 is None:
+        return p1
+    if p1[0] == p2[0] and (p1[1] + p2[1]) % SECP256K1_P == 0:
+        return None
+    if p1 == p2:
+        slope = 3 * p1[0] * p1[0] * pow(2 * p1[1], -1, SECP256K1_P)
+    else:
+        slope = (p2[1] - p1[1]) * pow(p2[0] - p1[0], -1, SECP256K1_P)
+    x = (slope * slope - p1[0] - p2[0]) % SECP256K1_P
+    return x, (slope * (p1[0] - x) - p1[1]) % SECP256K1_P
+
+def secp256k1_multiply(scalar, point=SECP256K1_G):
+    """Multiply a secp256k1 point by a scalar with double-and-add"""
+    result = None
+    while scalar:
+        if scalar & 1:
+            result = secp256k1_add(result, point)
+        point = secp256k1_add(point, point)
+        scalar >>= 1
+    return result
+
+def secp256k1_decompress(key):
+    """Recover the point of a 33-byte compressed public key"""
+    x = int.from_bytes(key[1:], 'big')
+    y = pow((pow(x, 3, SECP256K1_P) + 7) % SECP256K1_P, (SECP256K1_P + 1) // 4, SECP256K1_P)
+    if y & 1 != key[0] & 1:
+        y = SECP256K1_P - y
+    return x, y
+
+def secp256k1_compress(point):
+    """Serialize a secp256k1 point as a 33-byte compressed public key"""
+    return bytes([2 + (point[1] & 1)]) + point[0].to_bytes(32, 'big')
+
+def decode_xpub(xpub):
+    """Decode a BIP32 extended public key into its chain code and compressed public key"""
+    data = base58check_decode(xpub)
+    if len(data) != 78 or data[45] not in (2, 3):
+        raise ValueError("Not an extended public key")
+    return {'chain_code': data[13:45], 'key': data[45:78]}
+
+def derive_public_child(node, index):
+    """Derive the non-hardened BIP32 child of a public node"""
+    digest = hmac.new(node['chain_code'], node['key'] + index.to_bytes(4, 'big'), hashlib.sha512).digest()
+    tweak = int.from_bytes(digest[:32], 'big')
+    if tweak >= SECP256K1_N:
+        raise ValueError(f"Invalid child index {index}")
+    point = secp256k1_add(secp256k1_multiply(tweak), secp256k1_decompress(node['key']))
+    return {'chain_code': digest[32:], 'key': secp256k1_compress(point)}
+
+def public_key_address_bytes(key):
+    """Return the 20-byte account address (last bytes of Keccak-256 of the public point) shared by BSC and TRON"""
+    x, y = secp256k1_decompress(key)
+    return keccak256(x.to_bytes(32, 'big') + y.to_bytes(32, 'big'))[-20:]
+
+def bsc_checksum_address(address_bytes):
+    """Format a 20-byte address as an EIP-55 mixed-case 0x address"""
+    hex_address = address_bytes.hex()
+    digest = keccak256(hex_address.encode()).hex()
+    return '0x' + ''.join(
+        char.upper() if int(digest[i], 16) >= 8 else char
+        for i, char in enumerate(hex_address)
+    )
+
+def get_deposit_chain_node(network):
+    """Return the external chain node (<account>/0) of a network's escrow xpub, decoding it once"""
+    if network not in deposit_chain_nodes:
+        deposit_chain_nodes[network] = derive_public_child(decode_xpub(ESCROW_XPUBS[network]), 0)
+    return deposit_chain_nodes[network]
+
+def derive_deposit_address(network, index):
+    """Derive the watch-only deposit address at <account>/0/<index> for a network"""
+    key = (network, index)
+    if key not in derived_deposit_addresses:
+        address_bytes = public_key_address_bytes(derive_public_child(get_deposit_chain_node(network), index)['key'])
+        if network == "BSC":
+            derived_deposit_addresses[key] = bsc_checksum_address(address_bytes)
+        else:
+            derived_deposit_addresses[key] = base58check_encode(b'\x41' + address_bytes)
+    return derived_deposit_addresses[key]
+
+def get_deal_deposit_address(network, transaction_id):
+    """Return the deposit address of a deal, derived from its transaction ID"""
+    if ESCROW_XPUBS.get(network):
+        return derive_deposit_address(network, transaction_id)
+    return ESCROW_FALLBACK_ADDRESSES[network]
+
+def new_transaction_id(chat_id):
+    """Issue an 8-digit transaction ID starting with 9 that no other deal has used, it doubles as the derivation index"""
+    while True:
+        transaction_id = random.randint(90000000, 99999999)
+        if transaction_id not in transaction_chats:
+            transaction_chats[transaction_id] = chat_id
+            return transaction_id
+
+async def scan_tron_transfer_events(bot_app):
+    """Pull USDT Transfer events since the watermark and credit those sent to watched TRON addresses"""
+    # Start from now the first time, deposits are only expected after /deposit
+    if tron_event_cursor['min_timestamp'] is None:
+        tron_event_cursor['min_timestamp'] = int(time.time() * 1000)
+        return
+    
+    url = f"{TRONGRID_BASE_URL}/v1/contracts/{TRON_USDT_CONTRACT}/events"
+    params = {
+        'event_name': 'Transfer',
+        'only_confirmed': 'true',
+        'order_by': 'block_timestamp,asc',
+        'limit': TRON_PAGE_SIZE,
+        # Re-read the watermark timestamp, more events may share it
+        'min_block_timestamp': tron_event_cursor['min_timestamp']
+    }
+    
+    for _ in range(TRON_EVENT_MAX_PAGES):
+        # Hash set of watched base58 addresses
+        watched = {
+            address for address, info in monitored_addresses.items()
+            if info.network == "TRON" and is_address_polled(info)
+        }
+        
+        async with provider_semaphores["TRON"]:
+            data = await provider_request("trongrid", url, params)
+        if not data.get('success', True) or not data.get('data'):
+            break
+        
+        received = {}
+        for event in data['data']:
+            event_key = f"{event['transaction_id']}:{event.get('event_index', '')}"
+            if event_key in tron_event_cursor['seen']:
+                continue
+            
+            # Advance the watermark, only events at the newest timestamp need remembering
+            if event['block_timestamp'] > tron_event_cursor['min_timestamp']:
+                tron_event_cursor['min_timestamp'] = event['block_timestamp']
+                tron_event_cursor['seen'] = set()
+            tron_event_cursor['seen'].add(event_key)
+            
+            to_address = tron_address_from_event(event['result']['to'])
+            if to_address in watched:
+                received[to_address] = received.get(to_address, 0) + int(event['result']['value'])
+        
+        for address, value in received.items():
+            info = monitored_addresses.get(address)
+            if info:
+                tron_event_stats['matched'] += 1
+                await credit_deposit(bot_app, info, value / (10 ** USDT_DECIMALS["TRON"]))
+        tron_event_stats['pages'] += 1
+        
+        # Follow the next page only while there are more events in the window
+        fingerprint = data.get('meta', {}).get('fingerprint')
+        if not fingerprint:
+            break
+        params['fingerprint'] = fingerprint
+
+async def tron_event_watcher(bot_app):
+    """Background task that covers every watched TRON address with a single event scan per interval"""
+    while True:
+        delay = TRON_EVENT_SCAN_INTERVAL
+        try:
+            await scan_tron_transfer_events(bot_app)
+        except ProviderUnavailable as e:
+            # Wait out the open circuit instead of retrying every interval
+            delay = max(delay, e.retry_after)
+        except Exception as e:
+            tron_event_stats['errors'] += 1
+            print(f"Error scanning TRON transfer events: {e}")
+        await asyncio.sleep(delay)
+
+def schedule_address_check(address, delay):
+    """Queue a deposit check for an address after delay seconds"""
+    info = monitored_addresses.get(address)
+    if not info:
+        return
+    due = time.monotonic() + delay
+    info.next_check = due
+    heapq.heappush(monitor_schedule, (due, next(monitor_sequence), address))
+    monitor_wakeup.set()
+
+def boost_address_polling(address):
+    """Poll an address fast again, right after /deposit or a Check Payment press"""
+    info = monitored_addresses.get(address)
+    if not info:
+        return
+    info.cold = False
+    info.poll_interval = MONITOR_FAST_INTERVAL
+    schedule_address_check(address, 0)
+
+def reschedule_address_check(address, info, received):
+    """Back off after a check that found nothing, or let the address go cold once its deposit window has closed"""
+    window_ends = info.window_ends
+    if window_ends and datetime.now() > window_ends + timedelta(seconds=MONITOR_COLD_GRACE):
+        info.cold = True
+        print(f"Deposit window closed, stopped polling {info.network} address {address}")
+        return
+    
+    if received:
+        interval = MONITOR_FAST_INTERVAL
+    else:
+        interval = min(info.poll_interval * 2, MONITOR_MAX_INTERVAL)
+    info.poll_interval = interval
+    schedule_address_check(address, interval)
+
+def is_address_polled(info):
+    """Check whether an address still expects deposits (not cold)"""
+    return not info.cold
+
+def is_scan_watched(info):
+    """Check whether an address is covered by a chain-wide watcher instead of per-address polling"""
+    if info.network == "BSC":
+        return BSC_WATCHER_MODE == "logs"
+    return TRON_WATCHER_MODE == "events"
+
+async def monitor_deposits(bot_app):
+    """Background task to monitor escrow addresses for deposits, checking due addresses concurrently on their own schedule"""
+    while True:
+        cycle_started = time.monotonic()
+        try:
+            # Take every address that is due from the schedule
+            due = []
+            while monitor_schedule and monitor_schedule[0][0] <= cycle_started:
+                due_at, _, address = heapq.heappop(monitor_schedule)
+                info = monitored_addresses.get(address)
+                
+                # Skip entries superseded by a later reschedule, cold addresses and scanner-covered ones
+                if not info or info.next_check != due_at or info.cold or is_scan_watched(info):
+                    continue
+                
+                # Hold checks against an explorer whose circuit is open until it may be probed again
+                retry_after = circuit_retry_after(MONITOR_PROVIDERS[info.network])
+                if retry_after > 0:
+                    schedule_address_check(address, retry_after)
+                    continue
+                due.append((address, info))
+            
+            tasks = []
+            for address, info in due:
+                info.last_check = datetime.now()
+                tasks.append(asyncio.create_task(check_address_deposits(bot_app, address, info)))
+            
+            if tasks:
+                done, pending = await asyncio.wait(tasks, timeout=MONITOR_CYCLE_DEADLINE)
+                
+                # Slow checks must not hold up the next cycle, retry them soon
+                for task in pending:
+                    task.cancel()
+                for (address, info), task in zip(due, tasks):
+                    if monitored_addresses.get(address) is not info:
+                        # The address moved to another deal, which has its own schedule
+                        continue
+                    if task in pending:
+                        monitor_stats['timeouts'] += 1
+                        schedule_address_check(address, MONITOR_FAST_INTERVAL)
+                    elif isinstance(task.exception(), ProviderUnavailable):
+                        schedule_address_check(address, task.exception().retry_after)
+                    elif task.exception():
+                        print(f"Error checking {info.network} address {address}: {task.exception()}")
+                        reschedule_address_check(address, info, 0)
+                    else:
+                        reschedule_address_check(address, info, task.result())
+                
+                monitor_stats['cycles'] += 1
+                monitor_stats['checks'] += len(tasks)
+                monitor_stats['last_cycle_seconds'] = time.monotonic() - cycle_started
         
         except Exception as e:
             print(f"Error in deposit monitoring: {e}")
         
-        # Check every 30 seconds
-        await asyncio.sleep(30)
+        # Sleep until the next address is due, or until a new one is scheduled
+        wait = monitor_schedule[0][0] - time.monotonic() if monitor_schedule else MONITOR_MAX_INTERVAL
+        monitor_wakeup.clear()
+        try:
+            await asyncio.wait_for(monitor_wakeup.wait(), max(0, wait))
+        except asyncio.TimeoutError:
+            pass
+
+def format_monitor_stats():
+    """Format deposit monitor counters for /opstats"""
+    lines = ["<b>📡 DEPOSIT MONITOR</b>"]
+    cold = sum(1 for info in monitored_addresses.values() if info.cold)
+    lines.append(f"Watched addresses: {len(monitored_addresses)} ({cold} cold) | Scheduled: {len(monitor_schedule)}")
+    lines.append(
+        f"Cycles: {monitor_stats['cycles']} | Checks: {monitor_stats['checks']} | "
+        f"Timeouts: {monitor_stats['timeouts']} | Last cycle: {monitor_stats['last_cycle_seconds']:.2f}s"
+    )
+    if BSC_WATCHER_MODE == "logs":
+        lines.append(
+            f"BSC log scan: block {bsc_log_cursor['last_block']} | Ranges: {bsc_log_stats['ranges']} | "
+            f"Matched: {bsc_log_stats['matched']} | Errors: {bsc_log_stats['errors']}"
+        )
+    if TRON_WATCHER_MODE == "events":
+        lines.append(
+            f"TRON event scan: ts {tron_event_cursor['min_timestamp']} | Pages: {tron_event_stats['pages']} | "
+            f"Matched: {tron_event_stats['matched']} | Errors: {tron_event_stats['errors']}"
+        )
+    return "\n".join(lines)
 
 async def blacklist_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /blacklist command - admin only, ban replied user"""
@@ -1716,6 +3985,10 @@ async def track_chat_members(update: Update, context: ContextTypes.DEFAULT_TYPE)
         user_id = result.new_chat_member.user.id
         chat_id = result.chat.id
         
+        # Remember who joined so the group can be emptied when it is recycled
+        if chat_id in escrow_roles:
+            escrow_roles[chat_id].setdefault('members', set()).add(user_id)
+        
         # Check if the user is in the admin list
         if user_id in ADMIN_IDS:
             try:
@@ -1737,23 +4010,459 @@ async def track_chat_members(update: Update, context: ContextTypes.DEFAULT_TYPE)
             except Exception as e:
                 print(f"Failed to promote admin {user_id}: {e}")
 
+async def track_deal_activity(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Record the last time anything happened in an escrow group"""
+    chat = update.effective_chat
+    if chat and chat.id in escrow_roles:
+        escrow_roles[chat.id].last_activity = datetime.now()
+
+async def track_bot_membership(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Track the bot's own membership changes to wake up group provisioning"""
+    result = update.my_chat_member
+    event = bot_membership_events.get(result.chat.id)
+    if event:
+        event.set()
+
+async def opstats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /opstats command - admin only, show operational stats"""
+    user = update.effective_user
+    
+    # Check if user is an admin
+    if user.id not in ADMIN_IDS:
+        await update.message.reply_text(
+            "<b>⚠️ This command is only available for admins.</b>",
+            parse_mode='HTML'
+        )
+        return
+    
+    sections = [
+        format_readiness(),
+        format_group_pool_stats(),
+        format_group_queue_stats(),
+        format_user_account_stats(),
+        format_invite_link_stats(),
+        format_stage_timings(),
+        format_monitor_stats(),
+        format_api_key_stats(),
+        format_circuit_stats(),
+        format_lifecycle_stats(),
+        format_deal_store_stats()
+    ]
+    await update.message.reply_text("\n\n".join(sections), parse_mode='HTML')
+
+def store_json_default(value):
+    """Encode records as objects, and the datetimes and sets found in them as tagged JSON objects"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, set):
+        return {'$set': list(value)}
+    raise TypeError(f"Cannot store {type(value).__name__}")
+
+def store_json_hook(obj):
+    """Decode tagged JSON objects back into datetimes and sets"""
+    if len(obj) == 1:
+        if '$datetime' in obj:
+            return datetime.fromisoformat(obj['$datetime'])
+        if '$set' in obj:
+            return set(obj['$set'])
+    return obj
+
+def encode_store_value(table, value):
+    """Serialize a row, leaving out its transient fields"""
+    if isinstance(value, (dict, Record)):
+        value = {field: item for field, item in value.items() if field not in table.transient}
+    return json.dumps(value, default=store_json_default, separators=(',', ':'))
+
+def decode_store_value(data):
+    """Deserialize a row written by encode_store_value"""
+    return json.loads(data, object_hook=store_json_hook)
+
+def open_deal_store():
+    """Open the SQLite deal store in WAL mode, create its tables and load the tables kept fully in memory"""
+    reader = sqlite3.connect(DEAL_STORE_PATH)
+    reader.execute("PRAGMA journal_mode=WAL")
+    for table in deal_store_tables:
+        reader.execute(
+            f"CREATE TABLE IF NOT EXISTS {table.name} "
+            f"(key TEXT PRIMARY KEY, chat_id INTEGER, transaction_id INTEGER, data TEXT NOT NULL)"
+        )
+        for column in DEAL_STORE_INDEX_COLUMNS:
+            reader.execute(f"CREATE INDEX IF NOT EXISTS {table.name}_{column} ON {table.name} ({column})")
+    reader.commit()
+    deal_store['reader'] = reader
+    
+    started = time.perf_counter()
+    restored = os.path.exists(DEAL_SNAPSHOT_PATH) or os.path.exists(DEAL_JOURNAL_PATH)
+    if restored:
+        restore_live_state()
+    else:
+        # First start on this store: build the live state from SQLite once, the first snapshot takes over after
+        for table in deal_store_tables:
+            if not table.preload:
+                continue
+            for key, data in reader.execute(f"SELECT key, data FROM {table.name}"):
+                key = table.key_type(key)
+                dict.__setitem__(table, key, track_record(decode_store_value(data), table, key))
+    deal_store_stats['restore_ms'] = (time.perf_counter() - started) * 1000
+    print(
+        f"📂 Restored {len(escrow_roles)} deals and {len(monitored_addresses)} watched addresses "
+        f"in {deal_store_stats['restore_ms']:.0f} ms ({deal_store_stats['replayed']} journal entries replayed)"
+    )
+    
+    # Writes go through a single background thread with its own connection
+    deal_store['jobs'] = queue.Queue()
+    deal_store['writer'] = threading.Thread(
+        target=deal_store_writer,
+        args=(deal_store['jobs'], asyncio.get_running_loop()),
+        name="deal-store-writer",
+        daemon=True
+    )
+    deal_store['writer'].start()
+    
+    # State loaded from SQLite is not in any journal yet, snapshot it right away
+    if not restored:
+        take_deal_store_snapshot()
+
+def parse_store_line(line, tables):
+    """Split a snapshot or journal line into its table, decoded key and data ('' for a deletion, '-' for an eviction)"""
+    table_name, key, data = line.rstrip(b'\n').decode('utf-8').split('\t', 2)
+    table = tables[table_name]
+    return table, table.key_type(key), data
+
+def restore_live_state():
+    """Load the memory-mapped snapshot, then replay only the journal entries written after it"""
+    tables = {table.name: table for table in deal_store_tables if table.preload}
+    snapshot_sequence = 0
+    
+    if os.path.exists(DEAL_SNAPSHOT_PATH) and os.path.getsize(DEAL_SNAPSHOT_PATH) > 0:
+        with open(DEAL_SNAPSHOT_PATH, 'rb') as snapshot_file:
+            with mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as snapshot:
+                # Header: the last journal sequence number the snapshot includes
+                snapshot_sequence = int(snapshot.readline())
+                for line in iter(snapshot.readline, b''):
+                    table, key, data = parse_store_line(line, tables)
+                    dict.__setitem__(table, key, track_record(decode_store_value(data), table, key))
+    deal_store['sequence'] = snapshot_sequence
+    
+    if not os.path.exists(DEAL_JOURNAL_PATH):
+        return
+    with open(DEAL_JOURNAL_PATH, 'rb') as journal:
+        for line in journal:
+            # A line cut short by a crash is the end of the journal
+            if not line.endswith(b'\n'):
+                break
+            sequence, rest = line.split(b'\t', 1)
+            sequence = int(sequence)
+            if sequence <= snapshot_sequence:
+                continue
+            table, key, data = parse_store_line(rest, tables)
+            deal_store['sequence'] = sequence
+            if data == '-':
+                # Evicted only once committed, so SQLite already has the row and reads it through when needed
+                dict.pop(table, key, None)
+                table.dirty.discard(key)
+                deal_store_stats['replayed'] += 1
+                continue
+            if data:
+                dict.__setitem__(table, key, track_record(decode_store_value(data), table, key))
+            else:
+                dict.pop(table, key, None)
+            # The crash may have come before SQLite saw this change, write it again
+            table.dirty.add(key)
+            deal_store_stats['replayed'] += 1
+
+def restore_scanner_cursors():
+    """Point the log and event scanners at their restored cursors, registering fresh ones on first start"""
+    global bsc_log_cursor, tron_event_cursor
+    bsc_log_cursor = scanner_cursors.setdefault('bsc_logs', bsc_log_cursor)
+    tron_event_cursor = scanner_cursors.setdefault('tron_events', tron_event_cursor)
+
+def deal_store_writer(jobs, loop):
+    """Writer thread: commit queued row batches to SQLite and the journal, merging whatever has piled up, and write snapshots"""
+    connection = sqlite3.connect(DEAL_STORE_PATH)
+    connection.execute("PRAGMA synchronous=NORMAL")
+    journal = open(DEAL_JOURNAL_PATH, 'a', encoding='utf-8')
+    journaled = {table.name for table in deal_store_tables if table.preload}
+    
+    def write_rows(batch):
+        if not batch:
+            return
+        try:
+            # Journal first: a change SQLite missed is replayed from it at the next start
+            lines = []
+            for table_name, key, _, _, data, _ in batch:
+                if table_name in journaled:
+                    deal_store['sequence'] += 1
+                    lines.append(f"{deal_store['sequence']}\t{table_name}\t{key}\t{data or ''}\n")
+            journal.write(''.join(lines))
+            journal.flush()
+            
+            with connection:
+                for table_name, key, chat_id, transaction_id, data, _ in batch:
+                    if data is None:
+                        connection.execute(f"DELETE FROM {table_name} WHERE key = ?", (key,))
+                    else:
+                        connection.execute(
+                            f"INSERT OR REPLACE INTO {table_name} (key, chat_id, transaction_id, data) VALUES (?, ?, ?, ?)",
+                            (key, chat_id, transaction_id, data)
+                        )
+            loop.call_soon_threadsafe(confirm_deal_store_batch, batch, True)
+        except Exception as e:
+            print(f"Error writing deal store batch: {e}")
+            loop.call_soon_threadsafe(confirm_deal_store_batch, batch, False)
+    
+    def write_evictions(keys):
+        # SQLite keeps evicted rows, only the journal needs to know they left memory
+        lines = []
+        for table_name, key in keys:
+            deal_store['sequence'] += 1
+            lines.append(f"{deal_store['sequence']}\t{table_name}\t{key}\t-\n")
+        try:
+            journal.write(''.join(lines))
+            journal.flush()
+        except Exception as e:
+            print(f"Error journaling deal store evictions: {e}")
+    
+    while True:
+        ready = [jobs.get()]
+        while not jobs.empty():
+            ready.append(jobs.get_nowait())
+        
+        batch = []
+        for job in ready:
+            if job is not None and job[0] == 'rows':
+                batch.extend(job[1])
+                continue
+            # Evictions, snapshots and shutdown happen after every change queued before them
+            write_rows(batch)
+            batch = []
+            if job is not None and job[0] == 'evict':
+                write_evictions(job[1])
+                continue
+            if job is None:
+                journal.close()
+                connection.close()
+                return
+            try:
+                write_deal_store_snapshot(job[1])
+                # Everything journaled so far is in the snapshot, start a new journal
+                journal.close()
+                journal = open(DEAL_JOURNAL_PATH, 'w', encoding='utf-8')
+                deal_store_stats['snapshots'] += 1
+            except Exception as e:
+                print(f"Error writing deal store snapshot: {e}")
+        write_rows(batch)
+
+def write_deal_store_snapshot(rows):
+    """Atomically replace the snapshot file with the given live rows (writer thread only)"""
+    temporary_path = DEAL_SNAPSHOT_PATH + ".tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as snapshot:
+        snapshot.write(f"{deal_store['sequence']}\n")
+        snapshot.write(''.join(f"{table_name}\t{key}\t{data}\n" for table_name, key, data in rows))
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+    os.replace(temporary_path, DEAL_SNAPSHOT_PATH)
+
+def take_deal_store_snapshot():
+    """Queue a snapshot of every live row, after the changes made so far"""
+    if deal_store['jobs'] is None:
+        return
+    flush_deal_store()
+    rows = [
+        (table.name, str(key), encode_store_value(table, value))
+        for table in deal_store_tables if table.preload
+        for key, value in dict.items(table)
+    ]
+    deal_store['jobs'].put(('snapshot', rows))
+
+async def deal_store_snapshotter():
+    """Background task that snapshots the live state every DEAL_SNAPSHOT_INTERVAL seconds, keeping the journal short"""
+    while True:
+        await asyncio.sleep(DEAL_SNAPSHOT_INTERVAL)
+        try:
+            take_deal_store_snapshot()
+        except Exception as e:
+            print(f"Error taking deal store snapshot: {e}")
+
+def confirm_deal_store_batch(batch, committed):
+    """Mark rows of a batch as synced, or dirty again so the next flush retries them"""
+    tables = {table.name: table for table in deal_store_tables}
+    if committed:
+        deal_store_stats['flushes'] += 1
+        deal_store_stats['rows_written'] += len(batch)
+    else:
+        deal_store_stats['write_errors'] += 1
+    
+    for table_name, key, _, _, _, version in batch:
+        table = tables[table_name]
+        key = table.key_type(key)
+        if table.unsynced.get(key) != version:
+            # Changed again since, a newer version is on its way
+            continue
+        del table.unsynced[key]
+        if not committed:
+            table.dirty.add(key)
+
+def flush_deal_store():
+    """Serialize dirty rows and hand them to the writer thread without touching the disk"""
+    if deal_store['jobs'] is None:
+        return
+    # Evictions go first: a row loaded again and changed since is written after its eviction
+    evicted = [(table.name, str(key)) for table in deal_store_tables for key in table.evicted]
+    for table in deal_store_tables:
+        table.evicted.clear()
+    if evicted:
+        deal_store['jobs'].put(('evict', evicted))
+    
+    batch = []
+    for table in deal_store_tables:
+        for key in table.dirty:
+            version = next(deal_store['versions'])
+            table.unsynced[key] = version
+            value = dict.get(table, key)
+            if value is None:
+                batch.append((table.name, str(key), None, None, None, version))
+            else:
+                chat_id, transaction_id = table.index_columns(key, value)
+                batch.append((table.name, str(key), chat_id, transaction_id, encode_store_value(table, value), version))
+        table.dirty.clear()
+    if batch:
+        deal_store['jobs'].put(('rows', batch))
+
+async def deal_store_flusher():
+    """Background task that hands changed rows to the writer thread every DEAL_STORE_FLUSH_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(DEAL_STORE_FLUSH_INTERVAL)
+        try:
+            flush_deal_store()
+        except Exception as e:
+            print(f"Error flushing deal store: {e}")
+
+async def close_deal_store():
+    """Write out the last changes and wait for the writer thread to finish"""
+    if deal_store['writer'] is None:
+        return
+    # A final snapshot leaves no journal to replay on the next start
+    take_deal_store_snapshot()
+    deal_store['jobs'].put(None)
+    await asyncio.to_thread(deal_store['writer'].join)
+    deal_store['reader'].close()
+    deal_store.update(reader=None, jobs=None, writer=None)
+
+def format_deal_store_stats():
+    """Format deal store cache and write-behind counters for /opstats"""
+    lines = ["<b>💾 DEAL STORE</b>"]
+    for table in deal_store_tables:
+        lines.append(
+            f"{table.name}: {len(table)} in memory | Dirty: {len(table.dirty)} | Unsynced: {len(table.unsynced)}"
+        )
+    lines.append(
+        f"Flushes: {deal_store_stats['flushes']} | Rows written: {deal_store_stats['rows_written']} | "
+        f"Write errors: {deal_store_stats['write_errors']} | Read-through loads: {deal_store_stats['loads']}"
+    )
+    lines.append(
+        f"Snapshots: {deal_store_stats['snapshots']} | Last restore: {deal_store_stats['restore_ms']:.0f} ms "
+        f"({deal_store_stats['replayed']} journal entries replayed)"
+    )
+    
+    # Per-deal footprint: the deal record plus its watched addresses
+    sample = list(itertools.islice(dict.items(escrow_roles), DEAL_MEMORY_SAMPLE))
+    if sample:
+        total = 0
+        for chat_id, deal in sample:
+            total += deep_sizeof(deal)
+            for address in monitored_addresses.find_keys('chat_id', chat_id):
+                total += deep_sizeof(monitored_addresses[address])
+        lines.append(f"Memory per deal: {total / len(sample):.0f} bytes (sample of {len(sample)})")
+    return "\n".join(lines)
+
+async def post_init(application):
+    """Warm up identities and start background tasks once the application is initialized"""
+    # Restore deals and watched addresses before any handler runs
+    open_deal_store()
+    restore_scanner_cursors()
+    restore_group_pool()
+    asyncio.create_task(deal_store_flusher())
+    asyncio.create_task(deal_store_snapshotter())
+    
+    # Resolve identities and connect user accounts before the first /escrow
+    await warm_up_identities(application)
+    
+    # Decode the escrow xpubs now so a bad key fails at startup rather than on the first /deposit
+    for network, xpub in ESCROW_XPUBS.items():
+        if xpub:
+            get_deposit_chain_node(network)
+            print(f"✅ Per-deal {network} deposit addresses enabled")
+        else:
+            print(f"⚠️  {network}_ESCROW_XPUB not set, all {network} deals share {ESCROW_FALLBACK_ADDRESSES[network]}")
+    
+    # Open the shared explorer HTTP session before the monitor starts
+    get_http_session()
+    
+    # Resume polling every restored address that was not cold yet
+    for address, info in monitored_addresses.items():
+        if not info.cold:
+            schedule_address_check(address, 0)
+    
+    # Start deposit monitoring in background
+    asyncio.create_task(monitor_deposits(application))
+    if BSC_WATCHER_MODE == "logs":
+        asyncio.create_task(bsc_log_watcher(application))
+    if TRON_WATCHER_MODE == "events":
+        asyncio.create_task(tron_event_watcher(application))
+    
+    # Feed on-demand group creations to the user accounts
+    if user_accounts:
+        asyncio.create_task(group_creation_dispatcher(application))
+    
+    # Keep prepared escrow groups on standby, one refill worker per user account
+    if GROUP_POOL_SIZE > 0:
+        for _ in user_accounts:
+            asyncio.create_task(group_pool_refill(application))
+    
+    # Move deals through their lifecycle, archiving finished ones and returning their groups to the pool
+    asyncio.create_task(deal_lifecycle_manager(application))
+    
+    # Keep invite links minted ahead of time and rotated
+    asyncio.create_task(invite_link_manager(application))
+    
+    # Keep user account sessions alive and reconnect broken ones
+    if user_accounts:
+        asyncio.create_task(user_account_supervisor(application))
+
+async def post_shutdown(application):
+    """Stop user clients, close the HTTP session and write out the deal store while the event loop is still running"""
+    await close_http_session()
+    await close_deal_store()
+    
+    for account in user_accounts:
+        try:
+            if account['client'].is_connected:
+                await account['client'].stop()
+        except Exception as e:
+            print(f"Error stopping user account {account['name']}: {e}")
+
 def main():
     if not BOT_TOKEN:
         print("❌ Error: ESCROW_BOT_TOKEN environment variable not set!")
         print("Please set your Telegram bot token in Secrets.")
         return
     
-    if not API_ID or not API_HASH or not PHONE:
+    if not user_accounts:
         print("⚠️  Warning: Telegram user account credentials not configured!")
         print("   Group creation will not work without:")
         print("   - TELEGRAM_API_ID")
         print("   - TELEGRAM_API_HASH")
         print("   - TELEGRAM_PHONE")
+        print("   or TELEGRAM_USER_SESSIONS (session_name:api_id:api_hash:phone,...)")
         print("   Get credentials from https://my.telegram.org/apps")
         print("")
     
     app = ApplicationBuilder().token(BOT_TOKEN).build()
     
+    app.add_handler(TypeHandler(Update, track_deal_activity), group=-1)
     app.add_handler(CommandHandler("start", start_command))
     app.add_handler(CommandHandler("menu", menu_command))
     app.add_handler(CommandHandler("escrow", escrow_command))
@@ -1765,27 +4474,22 @@ def main():
     app.add_handler(CommandHandler("deposit", deposit_command))
     app.add_handler(CommandHandler("balance", balance_command))
     app.add_handler(CommandHandler("blacklist", blacklist_command))
+    app.add_handler(CommandHandler("opstats", opstats_command))
     app.add_handler(CallbackQueryHandler(button_callback))
     app.add_handler(ChatMemberHandler(track_chat_members, ChatMemberHandler.CHAT_MEMBER))
-    
-    # Start deposit monitoring in background
-    async def post_init(application):
-        asyncio.create_task(monitor_deposits(application))
+    app.add_handler(ChatMemberHandler(track_bot_membership, ChatMemberHandler.MY_CHAT_MEMBER))
     
     app.post_init = post_init
+    app.post_shutdown = post_shutdown
     
     print("✅ @PagaLEscrowBot is running...")
-    if BSCSCAN_API_KEY and TRONGRID_API_KEY:
-        print("✅ Blockchain monitoring enabled (BSC & TRON)")
+    if BSCSCAN_API_KEYS and TRONGRID_API_KEYS:
+        print(f"✅ Blockchain monitoring enabled (BSC & TRON, {len(BSCSCAN_API_KEYS)}/{len(TRONGRID_API_KEYS)} API keys)")
     else:
         print("⚠️  Blockchain monitoring disabled (API keys not configured)")
     
-    try:
-        app.run_polling()
-    finally:
-        # Stop user client if it's running
-        if user_client and user_client.is_connected:
-            asyncio.run(user_client.stop())
+    # Chat member updates are needed to track who joined each escrow group
+    app.run_polling(allowed_updates=Update.ALL_TYPES)
 
 if __name__ == "__main__":
     main()
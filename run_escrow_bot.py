@@ -1,7 +1,6 @@
 """
 Run PagaL Escrow Bot only
 """
-import asyncio
 import sys
 import types
 import os
@@ -18,10 +17,12 @@ def main():
     print("✅ PagaL Escrow Bot (@PagaLEscrowBot) - Starting...")
     
     import escrow_bot
-    from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, ChatMemberHandler
+    from telegram import Update
+    from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, ChatMemberHandler, TypeHandler
     
     app = ApplicationBuilder().token(escrow_token).build()
     
+    app.add_handler(TypeHandler(Update, escrow_bot.track_deal_activity), group=-1)
     app.add_handler(CommandHandler("start", escrow_bot.start_command))
     app.add_handler(CommandHandler("menu", escrow_bot.menu_command))
     app.add_handler(CommandHandler("escrow", escrow_bot.escrow_command))
@@ -33,18 +34,18 @@ def main():
     app.add_handler(CommandHandler("deposit", escrow_bot.deposit_command))
     app.add_handler(CommandHandler("balance", escrow_bot.balance_command))
     app.add_handler(CommandHandler("blacklist", escrow_bot.blacklist_command))
+    app.add_handler(CommandHandler("opstats", escrow_bot.opstats_command))
     app.add_handler(CallbackQueryHandler(escrow_bot.button_callback))
     app.add_handler(ChatMemberHandler(escrow_bot.track_chat_members, ChatMemberHandler.CHAT_MEMBER))
+    app.add_handler(ChatMemberHandler(escrow_bot.track_bot_membership, ChatMemberHandler.MY_CHAT_MEMBER))
     
-    async def post_init(application):
-        asyncio.create_task(escrow_bot.monitor_deposits(application))
-    
-    app.post_init = post_init
+    app.post_init = escrow_bot.post_init
+    app.post_shutdown = escrow_bot.post_shutdown
     
     print("✅ PagaL Escrow Bot is running...")
     print("✅ Bot is now polling for updates...")
     
-    app.run_polling()
+    app.run_polling(allowed_updates=Update.ALL_TYPES)
 
 if __name__ == "__main__":
     main()
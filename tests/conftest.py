@@ -0,0 +1,99 @@
+"""
+Shared fixtures for the escrow_bot tests.
+
+The deal store, derivation and scanner code under test only needs the standard library. When the
+Telegram, Pyrogram, Pillow or aiohttp packages are not installed, minimal stand-ins for the names
+escrow_bot imports from them are registered so the module can still be imported; no test calls into them.
+"""
+import importlib.util
+import sys
+import types
+
+import pytest
+
+
+_MISSING = {name for name in ("telegram", "pyrogram", "PIL", "aiohttp") if importlib.util.find_spec(name) is None}
+
+
+def _install_stand_in(name, **attributes):
+    if name.split('.')[0] not in _MISSING:
+        return
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    parent, _, child = name.rpartition('.')
+    if parent:
+        setattr(sys.modules[parent], child, module)
+
+
+def _stand_in_class(name, base=object):
+    return type(name, (base,), {'__init__': lambda self, *args, **kwargs: None})
+
+
+class _FloodWait(Exception):
+    def __init__(self, value=0):
+        super().__init__(f"Flood wait {value}s")
+        self.value = value
+
+
+class _ContextTypes:
+    DEFAULT_TYPE = object
+
+
+_install_stand_in(
+    "telegram",
+    **{name: _stand_in_class(name) for name in ("Update", "InlineKeyboardButton", "InlineKeyboardMarkup", "ChatMemberUpdated")}
+)
+_install_stand_in(
+    "telegram.ext",
+    ContextTypes=_ContextTypes,
+    **{name: _stand_in_class(name) for name in (
+        "ApplicationBuilder", "CommandHandler", "CallbackQueryHandler", "ChatMemberHandler", "TypeHandler"
+    )}
+)
+_install_stand_in(
+    "telegram.error",
+    BadRequest=_stand_in_class("BadRequest", Exception),
+    Forbidden=_stand_in_class("Forbidden", Exception)
+)
+_install_stand_in("pyrogram", Client=_stand_in_class("Client"), enums=types.SimpleNamespace())
+_install_stand_in(
+    "pyrogram.errors",
+    FloodWait=_FloodWait,
+    UserAlreadyParticipant=_stand_in_class("UserAlreadyParticipant", Exception),
+    BadRequest=_stand_in_class("BadRequest", Exception),
+    Forbidden=_stand_in_class("Forbidden", Exception)
+)
+_install_stand_in("pyrogram.types", ChatPrivileges=_stand_in_class("ChatPrivileges"))
+_install_stand_in("PIL", Image=None, ImageDraw=None, ImageFont=None)
+_install_stand_in("aiohttp")
+
+import escrow_bot  # noqa: E402
+
+
+def reset_deal_store():
+    """Empty every deal store table and forget the store connection, as in a fresh process"""
+    for table in escrow_bot.deal_store_tables:
+        dict.clear(table)
+        table.dirty.clear()
+        table.unsynced.clear()
+        table.missing.clear()
+        table.evicted.clear()
+    escrow_bot.deal_store.update(reader=None, jobs=None, writer=None, sequence=0)
+    for counter in escrow_bot.deal_store_stats:
+        escrow_bot.deal_store_stats[counter] = 0
+
+
+@pytest.fixture
+def deal_store_files(tmp_path, monkeypatch):
+    """Point the deal store, snapshot and journal at a temporary directory, starting from empty tables"""
+    monkeypatch.setattr(escrow_bot, "DEAL_STORE_PATH", str(tmp_path / "deals.db"))
+    monkeypatch.setattr(escrow_bot, "DEAL_SNAPSHOT_PATH", str(tmp_path / "deals.db.snapshot"))
+    monkeypatch.setattr(escrow_bot, "DEAL_JOURNAL_PATH", str(tmp_path / "deals.db.journal"))
+    reset_deal_store()
+    yield tmp_path
+    if escrow_bot.deal_store['writer'] is not None:
+        escrow_bot.deal_store['jobs'].put(None)
+        escrow_bot.deal_store['writer'].join()
+        escrow_bot.deal_store['reader'].close()
+    reset_deal_store()
@@ -0,0 +1,115 @@
+"""
+BSC log-scan watcher (BSC_WATCHER_MODE = "logs") against a stub JSON-RPC node
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import escrow_bot
+from conftest import reset_deal_store
+
+WATCHED = "0x00000000000000000000000000000000000000Aa"
+OTHER = "0x00000000000000000000000000000000000000Bb"
+
+
+def address_topic(address):
+    return '0x' + address[2:].lower().rjust(64, '0')
+
+
+class StubBscNode:
+    """In-memory stand-in for the eth_blockNumber / eth_getLogs endpoint behind BSC_RPC_URL"""
+
+    def __init__(self, head):
+        self.head = head
+        self.logs = []
+        self.ranges = []
+
+    def add_transfer(self, block, to_address, amount):
+        self.logs.append({
+            'blockNumber': hex(block),
+            'topics': [escrow_bot.ERC20_TRANSFER_TOPIC, address_topic(OTHER), address_topic(to_address)],
+            'data': hex(int(amount * 10 ** escrow_bot.USDT_DECIMALS['BSC']))
+        })
+
+    async def call(self, method, params):
+        if method == 'eth_blockNumber':
+            return hex(self.head)
+        assert method == 'eth_getLogs'
+        log_filter = params[0]
+        assert log_filter['address'] == escrow_bot.BSC_USDT_CONTRACT
+        assert log_filter['topics'][0] == escrow_bot.ERC20_TRANSFER_TOPIC
+        from_block, to_block = int(log_filter['fromBlock'], 16), int(log_filter['toBlock'], 16)
+        self.ranges.append((from_block, to_block))
+        recipients = set(log_filter['topics'][2])
+        return [
+            log for log in self.logs
+            if from_block <= int(log['blockNumber'], 16) <= to_block and log['topics'][2] in recipients
+        ]
+
+
+@pytest.fixture
+def node(monkeypatch):
+    reset_deal_store()
+    stub = StubBscNode(head=135 + escrow_bot.BSC_LOG_CONFIRMATIONS)
+    credited = []
+
+    async def record_credit(bot_app, info, amount):
+        credited.append((info.chat_id, amount))
+
+    monkeypatch.setattr(escrow_bot, "bsc_rpc_call", stub.call)
+    monkeypatch.setattr(escrow_bot, "credit_deposit", record_credit)
+    monkeypatch.setattr(escrow_bot, "BSC_LOG_BLOCK_RANGE", 10)
+    monkeypatch.setattr(escrow_bot, "bsc_log_cursor", {'last_block': 100})
+    escrow_bot.monitored_addresses[WATCHED] = {
+        'chat_id': -100, 'transaction_id': 9001, 'network': 'BSC', 'token': 'USDT', 'network_label': 'BEP20',
+        'last_check': datetime.now(), 'window_ends': datetime.now() + timedelta(minutes=20)
+    }
+    stub.credited = credited
+    yield stub
+    reset_deal_store()
+
+
+def test_new_blocks_are_scanned_in_fixed_size_ranges(node):
+    asyncio.run(escrow_bot.scan_bsc_transfer_logs(None))
+    assert node.ranges == [(101, 110), (111, 120), (121, 130), (131, 135)]
+    assert escrow_bot.bsc_log_cursor['last_block'] == 135
+
+
+def test_transfers_match_on_the_recipient_topic(node):
+    node.add_transfer(105, WATCHED, 3)
+    node.add_transfer(107, WATCHED, 2)
+    node.add_transfer(107, OTHER, 50)
+    node.add_transfer(125, WATCHED, 1.5)
+    asyncio.run(escrow_bot.scan_bsc_transfer_logs(None))
+    # Transfers within one range are credited together, unwatched recipients never
+    assert node.credited == [(-100, 5), (-100, 1.5)]
+
+
+def test_cold_addresses_are_not_watched(node):
+    escrow_bot.monitored_addresses[WATCHED].cold = True
+    node.add_transfer(105, WATCHED, 3)
+    asyncio.run(escrow_bot.scan_bsc_transfer_logs(None))
+    assert node.credited == []
+    assert escrow_bot.bsc_log_cursor['last_block'] == 135
+
+
+def test_cursor_never_moves_backwards(node):
+    node.add_transfer(105, WATCHED, 3)
+    asyncio.run(escrow_bot.scan_bsc_transfer_logs(None))
+
+    # A lagging node reports an older head: nothing is re-read or credited again
+    node.head = 120 + escrow_bot.BSC_LOG_CONFIRMATIONS
+    node.ranges.clear()
+    asyncio.run(escrow_bot.scan_bsc_transfer_logs(None))
+    assert node.ranges == []
+    assert escrow_bot.bsc_log_cursor['last_block'] == 135
+    assert node.credited == [(-100, 3)]
+
+
+def test_first_scan_starts_at_the_head(node, monkeypatch):
+    monkeypatch.setattr(escrow_bot, "bsc_log_cursor", {'last_block': None})
+    node.add_transfer(105, WATCHED, 3)
+    asyncio.run(escrow_bot.scan_bsc_transfer_logs(None))
+    assert node.ranges == []
+    assert escrow_bot.bsc_log_cursor['last_block'] == 135
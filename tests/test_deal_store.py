@@ -0,0 +1,207 @@
+"""
+Write-behind deal store: journal and snapshot restore, crash recovery and lifecycle eviction
+"""
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta
+
+import escrow_bot
+from conftest import reset_deal_store
+
+
+async def settle():
+    """Hand dirty rows to the writer thread and wait until it has committed them"""
+    escrow_bot.flush_deal_store()
+    for _ in range(500):
+        if escrow_bot.deal_store['jobs'].empty() and not any(
+            table.dirty or table.unsynced for table in escrow_bot.deal_store_tables
+        ):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("deal store writer did not catch up")
+
+
+def crash():
+    """Stop the writer without the final snapshot close_deal_store takes, then drop all in-memory state"""
+    escrow_bot.deal_store['jobs'].put(None)
+    escrow_bot.deal_store['writer'].join()
+    escrow_bot.deal_store['reader'].close()
+    reset_deal_store()
+
+
+def journal_lines(tmp_path):
+    return (tmp_path / "deals.db.journal").read_text().splitlines()
+
+
+def new_deal(transaction_id, **fields):
+    return {'transaction_id': transaction_id, 'last_activity': datetime.now(), **fields}
+
+
+class FailingInserts:
+    """sqlite3 connection whose row inserts fail while failing is set, as if the process died before the commit"""
+    failing = False
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql, *args):
+        if FailingInserts.failing and sql.startswith("INSERT"):
+            raise sqlite3.OperationalError("disk I/O error")
+        return self.connection.execute(sql, *args)
+
+    def __enter__(self):
+        return self.connection.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self.connection.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+
+def test_crash_after_journal_before_commit_is_replayed(deal_store_files, monkeypatch):
+    connect = sqlite3.connect
+    monkeypatch.setattr(escrow_bot.sqlite3, "connect", lambda *args: FailingInserts(connect(*args)))
+
+    async def first_run():
+        escrow_bot.open_deal_store()
+        FailingInserts.failing = True
+        escrow_bot.escrow_roles[-100] = new_deal(9001, buyer={'user_id': 1, 'username': '@buyer'})
+        escrow_bot.flush_deal_store()
+        # The batch is journaled, then its SQLite transaction fails and the process dies
+        for _ in range(500):
+            if escrow_bot.deal_store_stats['write_errors']:
+                break
+            await asyncio.sleep(0.01)
+        assert escrow_bot.deal_store_stats['write_errors'] == 1
+        crash()
+
+    async def second_run():
+        FailingInserts.failing = False
+        escrow_bot.open_deal_store()
+        deal = escrow_bot.escrow_roles[-100]
+        assert deal.buyer.username == '@buyer'
+        assert escrow_bot.deal_store_stats['replayed'] == 1
+        # The replayed row is written to SQLite again
+        await settle()
+        crash()
+
+    asyncio.run(first_run())
+    assert any("\tdeals\t-100\t{" in line for line in journal_lines(deal_store_files))
+    asyncio.run(second_run())
+
+    row = connect(str(deal_store_files / "deals.db")).execute("SELECT transaction_id FROM deals WHERE key = '-100'").fetchone()
+    assert row == (9001,)
+
+
+def test_evicted_row_reloads_and_keeps_later_changes(deal_store_files):
+    async def first_run():
+        escrow_bot.open_deal_store()
+        escrow_bot.escrow_roles[-100] = new_deal(9001)
+        escrow_bot.escrow_roles[-200] = new_deal(9002)
+
+        # Rows with changes not yet committed stay in memory
+        assert not escrow_bot.escrow_roles.evict(-100)
+        await settle()
+        assert escrow_bot.escrow_roles.evict(-100)
+        assert escrow_bot.escrow_roles.evict(-200)
+        assert not dict.__contains__(escrow_bot.escrow_roles, -100)
+
+        # Read back through SQLite and changed again
+        deal = escrow_bot.escrow_roles[-100]
+        assert deal.transaction_id == 9001
+        deal.status = escrow_bot.DealState.FUNDED
+        await settle()
+        crash()
+
+    async def second_run():
+        escrow_bot.open_deal_store()
+        # The change after the eviction wins, the row evicted for good stays on disk only
+        assert dict.__contains__(escrow_bot.escrow_roles, -100)
+        assert escrow_bot.escrow_roles[-100].status is escrow_bot.DealState.FUNDED
+        assert not dict.__contains__(escrow_bot.escrow_roles, -200)
+        assert escrow_bot.escrow_roles.dirty.isdisjoint({-200})
+        assert escrow_bot.escrow_roles[-200].transaction_id == 9002
+        await settle()
+        crash()
+
+    asyncio.run(first_run())
+    lines = [line.split('\t', 1)[1] for line in journal_lines(deal_store_files)]
+    assert lines.index("deals\t-100\t-") < max(index for index, line in enumerate(lines) if line.startswith("deals\t-100\t{"))
+    asyncio.run(second_run())
+
+
+def test_restore_reads_snapshot_and_only_the_journal_tail(deal_store_files):
+    async def first_run():
+        escrow_bot.open_deal_store()
+        escrow_bot.escrow_roles[-100] = new_deal(9001)
+        await settle()
+        snapshots = escrow_bot.deal_store_stats['snapshots']
+        escrow_bot.take_deal_store_snapshot()
+        for _ in range(500):
+            if escrow_bot.deal_store_stats['snapshots'] > snapshots:
+                break
+            await asyncio.sleep(0.01)
+        escrow_bot.escrow_roles[-200] = new_deal(9002)
+        await settle()
+        crash()
+
+    asyncio.run(first_run())
+    tail = journal_lines(deal_store_files)
+    assert [line.split('\t')[1:3] for line in tail] == [['deals', '-200']]
+
+    # An entry the snapshot already covers must be skipped, and -100 must come from the snapshot, not SQLite
+    snapshot_sequence = int((deal_store_files / "deals.db.snapshot").read_text().splitlines()[0])
+    with open(deal_store_files / "deals.db.journal", 'a') as journal:
+        journal.write(f"{snapshot_sequence}\tdeals\t-100\t\n")
+    connection = sqlite3.connect(str(deal_store_files / "deals.db"))
+    with connection:
+        connection.execute("DELETE FROM deals WHERE key = '-100'")
+    connection.close()
+
+    async def second_run():
+        escrow_bot.open_deal_store()
+        assert escrow_bot.deal_store_stats['replayed'] == 1
+        assert dict.__contains__(escrow_bot.escrow_roles, -100)
+        assert escrow_bot.escrow_roles[-200].transaction_id == 9002
+        crash()
+
+    asyncio.run(second_run())
+
+
+def test_lifecycle_sweep_evicts_idle_deals_across_a_restart(deal_store_files):
+    idle_since = datetime.now() - timedelta(seconds=escrow_bot.DEAL_IDLE_TTL + 60)
+
+    async def first_run():
+        escrow_bot.open_deal_store()
+        escrow_bot.escrow_roles[-100] = new_deal(9001, last_activity=idle_since)
+        escrow_bot.escrow_roles[-200] = new_deal(9002)
+        await settle()
+
+        # The first sweep marks the deal idle, the next one evicts it once that change is committed
+        await escrow_bot.sweep_deals(None)
+        assert escrow_bot.escrow_roles[-100].status is escrow_bot.DealState.IDLE
+        await settle()
+        await escrow_bot.sweep_deals(None)
+        assert not dict.__contains__(escrow_bot.escrow_roles, -100)
+        assert escrow_bot.idle_deals[-100] == idle_since
+        assert escrow_bot.escrow_roles[-200].status is escrow_bot.DealState.OPEN
+        await settle()
+        crash()
+
+    asyncio.run(first_run())
+    assert any(line.endswith("\tdeals\t-100\t-") for line in journal_lines(deal_store_files))
+
+    async def second_run():
+        escrow_bot.open_deal_store()
+        assert not dict.__contains__(escrow_bot.escrow_roles, -100)
+        assert escrow_bot.idle_deals[-100] == idle_since
+
+        # Activity in the group reads the deal back, and the next sweep drops its idle marker
+        escrow_bot.escrow_roles[-100].last_activity = datetime.now()
+        await escrow_bot.sweep_deals(None)
+        assert -100 not in escrow_bot.idle_deals
+        assert escrow_bot.escrow_roles[-100].status is escrow_bot.DealState.OPEN
+        crash()
+
+    asyncio.run(second_run())
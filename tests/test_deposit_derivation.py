@@ -0,0 +1,46 @@
+"""
+Known-answer tests for the watch-only deposit address derivation in escrow_bot
+"""
+import pytest
+
+escrow_bot = pytest.importorskip("escrow_bot")
+
+# BIP32 test vectors: (parent xpub, child index, expected child xpub)
+BIP32_PUBLIC_VECTORS = [
+    # Test vector 1, m/0H -> m/0H/1
+    (
+        "xpub68Gmy5EdvgibQVfPdqkBBCHxA5htiqg55crXYuXoQRKfDBFA1WEjWgP6LHhwBZeNK1VTsfTFUHCdrfp1bgwQ9xv5ski8PX9rL2dZXvgGDnw",
+        1,
+        "xpub6ASuArnXKPbfEwhqN6e3mwBcDTgzisQN1wXN9BJcM47sSikHjJf3UFHKkNAWbWMiGj7Wf5uMash7SyYq527Hqck2AxYysAA7xmALppuCkwQ",
+    ),
+    # Test vector 2, m -> m/0
+    (
+        "xpub661MyMwAqRbcFW31YEwpkMuc5THy2PSt5bDMsktWQcFF8syAmRUapSCGu8ED9W6oDMSgv6Zz8idoc4a6mr8BDzTJY47LJhkJ8UB7WEGuduB",
+        0,
+        "xpub69H7F5d8KSRgmmdJg2KhpAK8SR3DjMwAdkxj3ZuxV27CprR9LgpeyGmXUbC6wb7ERfvrnKZjXoUmmDznezpbZb7ap6r1D3tgFxHmwMkQTPH",
+    ),
+]
+
+
+@pytest.mark.parametrize("parent, index, child", BIP32_PUBLIC_VECTORS)
+def test_derive_public_child_matches_bip32_vectors(parent, index, child):
+    derived = escrow_bot.derive_public_child(escrow_bot.decode_xpub(parent), index)
+    assert derived == escrow_bot.decode_xpub(child)
+
+
+def test_keccak256_empty_input():
+    assert escrow_bot.keccak256(b"").hex() == "c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470"
+
+
+def test_addresses_of_private_key_one():
+    # The public key of private key 1 is the generator point
+    key = escrow_bot.secp256k1_compress(escrow_bot.SECP256K1_G)
+    address_bytes = escrow_bot.public_key_address_bytes(key)
+    assert escrow_bot.bsc_checksum_address(address_bytes) == "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf"
+    assert escrow_bot.base58check_encode(b"\x41" + address_bytes) == "TMVQGm1qAQYVdetCeGRRkTWYYrLXuHK2HC"
+
+
+def test_decode_xpub_round_trips_compressed_key():
+    node = escrow_bot.decode_xpub(BIP32_PUBLIC_VECTORS[1][0])
+    point = escrow_bot.secp256k1_decompress(node['key'])
+    assert escrow_bot.secp256k1_compress(point) == node['key']
@@ -0,0 +1,108 @@
+"""
+TRON event-scan watcher (TRON_WATCHER_MODE = "events") against a stub TronGrid events endpoint
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import escrow_bot
+from conftest import reset_deal_store
+
+WATCHED_BYTES = bytes(range(1, 21))
+WATCHED = escrow_bot.base58check_encode(b'\x41' + WATCHED_BYTES)
+OTHER_HEX = '0x' + 'ee' * 20
+STUB_BASE_URL = "http://trongrid.stub"
+
+
+def transfer(transaction_id, timestamp, to_address, amount, event_index=0):
+    return {
+        'transaction_id': transaction_id,
+        'event_index': event_index,
+        'block_timestamp': timestamp,
+        'result': {'to': to_address, 'value': str(int(amount * 10 ** escrow_bot.USDT_DECIMALS['TRON']))}
+    }
+
+
+class StubTronGrid:
+    """In-memory stand-in for /v1/contracts/<contract>/events behind TRONGRID_BASE_URL, paged by fingerprint"""
+
+    def __init__(self):
+        self.pages = {}  # {fingerprint or None: (events, next fingerprint)}
+        self.requests = []
+
+    async def request(self, provider, url, params=None):
+        assert provider == "trongrid"
+        assert url == f"{STUB_BASE_URL}/v1/contracts/{escrow_bot.TRON_USDT_CONTRACT}/events"
+        self.requests.append(dict(params))
+        events, fingerprint = self.pages.get(params.get('fingerprint'), ([], None))
+        data = {'success': True, 'data': events, 'meta': {}}
+        if fingerprint:
+            data['meta']['fingerprint'] = fingerprint
+        return data
+
+
+@pytest.fixture
+def trongrid(monkeypatch):
+    reset_deal_store()
+    stub = StubTronGrid()
+    credited = []
+
+    async def record_credit(bot_app, info, amount):
+        credited.append((info.chat_id, amount))
+
+    monkeypatch.setattr(escrow_bot, "TRONGRID_BASE_URL", STUB_BASE_URL)
+    monkeypatch.setattr(escrow_bot, "provider_request", stub.request)
+    monkeypatch.setattr(escrow_bot, "credit_deposit", record_credit)
+    monkeypatch.setattr(escrow_bot, "tron_event_cursor", {'min_timestamp': 1000, 'seen': set()})
+    escrow_bot.monitored_addresses[WATCHED] = {
+        'chat_id': -100, 'transaction_id': 9001, 'network': 'TRON', 'token': 'USDT', 'network_label': 'TRC20',
+        'last_check': datetime.now(), 'window_ends': datetime.now() + timedelta(minutes=20)
+    }
+    stub.credited = credited
+    yield stub
+    reset_deal_store()
+
+
+def test_recipients_match_the_watched_base58_address(trongrid):
+    trongrid.pages[None] = ([
+        transfer('a', 1000, '0x' + WATCHED_BYTES.hex(), 2),
+        transfer('b', 1100, '41' + WATCHED_BYTES.hex(), 3),
+        transfer('c', 1200, WATCHED, 1),
+        transfer('d', 1300, OTHER_HEX, 40),
+    ], None)
+    asyncio.run(escrow_bot.scan_tron_transfer_events(None))
+    assert trongrid.requests[0]['min_block_timestamp'] == 1000
+    assert trongrid.credited == [(-100, 6)]
+
+
+def test_pages_are_followed_and_repeated_events_counted_once(trongrid):
+    trongrid.pages[None] = ([transfer('a', 1000, WATCHED, 1), transfer('b', 2000, WATCHED, 2)], 'page-2')
+    trongrid.pages['page-2'] = ([transfer('b', 2000, WATCHED, 2), transfer('c', 3000, WATCHED, 4)], None)
+    asyncio.run(escrow_bot.scan_tron_transfer_events(None))
+    assert [request.get('fingerprint') for request in trongrid.requests] == [None, 'page-2']
+    assert trongrid.credited == [(-100, 3), (-100, 4)]
+    assert escrow_bot.tron_event_cursor == {'min_timestamp': 3000, 'seen': {'c:0'}}
+
+    # The next scan re-reads the watermark timestamp without crediting its events again
+    trongrid.requests.clear()
+    trongrid.pages = {None: ([transfer('c', 3000, WATCHED, 4), transfer('e', 3000, WATCHED, 5, event_index=1)], None)}
+    asyncio.run(escrow_bot.scan_tron_transfer_events(None))
+    assert trongrid.requests[0]['min_block_timestamp'] == 3000
+    assert trongrid.credited[2:] == [(-100, 5)]
+
+
+def test_watermark_never_moves_backwards(trongrid):
+    escrow_bot.tron_event_cursor.update(min_timestamp=5000, seen={'x:0'})
+    trongrid.pages[None] = ([transfer('x', 5000, WATCHED, 1), transfer('y', 4000, WATCHED, 2)], None)
+    asyncio.run(escrow_bot.scan_tron_transfer_events(None))
+    assert escrow_bot.tron_event_cursor['min_timestamp'] == 5000
+    assert escrow_bot.tron_event_cursor['seen'] == {'x:0', 'y:0'}
+    assert trongrid.credited == [(-100, 2)]
+
+
+def test_first_scan_starts_from_now(trongrid, monkeypatch):
+    monkeypatch.setattr(escrow_bot, "tron_event_cursor", {'min_timestamp': None, 'seen': set()})
+    asyncio.run(escrow_bot.scan_tron_transfer_events(None))
+    assert trongrid.requests == []
+    assert escrow_bot.tron_event_cursor['min_timestamp'] > 0